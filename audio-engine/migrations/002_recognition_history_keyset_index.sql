@@ -0,0 +1,6 @@
+-- Composite index for keyset pagination of recognition history
+
+-- Serves WHERE user_id = ? AND (created_at, id) < (?, ?)
+-- ORDER BY created_at DESC, id DESC as a single index range scan
+CREATE INDEX IF NOT EXISTS idx_recognition_logs_user_created_id
+    ON recognition_logs(user_id, created_at DESC, id DESC);
@@ -2,10 +2,14 @@
 Recognition endpoints for music identification
 """
 
+import asyncio
+import hashlib
+import os
 import time
-import uuid
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from anyio import CapacityLimiter, to_thread
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
@@ -16,22 +20,168 @@ from app.core.exceptions import (
     AudioTooLongError,
     RecognitionFailedError
 )
+from app.core.responses import build_error_body, prebuilt_error_response
 from app.models.recognition import RecognitionRequest, RecognitionResponse, RecognitionResult
-from app.services.audio_service import AudioService
-from app.services.recognition_service import RecognitionService
-from app.utils.audio_utils import validate_audio_file, get_audio_duration
+from app.services.audio_service import AudioService, get_audio_service
+from app.services.recognition_logger import BatchLogger, get_batch_logger
+from app.services.recognition_service import RecognitionService, get_recognition_service
+from app.utils.audio_header import HEADER_PROBE_SIZE, probe_duration_from_header
+from app.utils.audio_utils import validate_audio_file_sync, get_audio_duration
+from app.utils.pagination import clamp_history_limit, decode_history_cursor, encode_history_cursor
 
 router = APIRouter()
 
+# Limits read on every request, bound once as plain module globals
+MAX_AUDIO_SIZE = settings.MAX_AUDIO_SIZE
+MIN_AUDIO_DURATION = settings.MIN_AUDIO_DURATION
+MAX_AUDIO_DURATION = settings.MAX_AUDIO_DURATION
+
+# Accepted upload content types; the tuple is what error details report
+SUPPORTED_AUDIO_FORMATS = frozenset({
+    "audio/mpeg",
+    "audio/wav",
+    "audio/x-wav",
+    "audio/flac",
+    "audio/x-flac",
+    "audio/aac",
+    "audio/ogg",
+})
+SUPPORTED_AUDIO_FORMATS_LIST = tuple(sorted(SUPPORTED_AUDIO_FORMATS))
+
+# Header parsing is CPU-bound, so it runs in worker threads capped at one
+# per core to keep the event loop free for concurrent uploads; anyio 3.x
+# can only build the limiter inside a running event loop
+_validate_limiter: Optional[CapacityLimiter] = None
+
+
+def _get_validate_limiter() -> CapacityLimiter:
+    """Get or create the header validation limiter on first use"""
+    global _validate_limiter
+    
+    if _validate_limiter is None:
+        _validate_limiter = CapacityLimiter(os.cpu_count() or 4)
+    
+    return _validate_limiter
+
+
+# Fixed error bodies, serialized once so high-rate rejections skip the
+# exception handler and per-request JSON encoding
+_OVERSIZE_DETAIL = f"Audio file too large. Maximum size: {MAX_AUDIO_SIZE / (1024*1024):.1f}MB"
+
+_ERROR_BODIES: Dict[int, bytes] = {
+    413: build_error_body("HTTP_ERROR", _OVERSIZE_DETAIL, 413),
+}
+
+# Recent successful results keyed by audio content, so client retries of the
+# same clip skip processing and the vector search entirely. This is the only
+# recognition result cache; keys are hashed in worker threads.
+_recognition_cache: TTLCache = TTLCache(maxsize=50_000, ttl=900)
+_cache_hits = 0
+_cache_misses = 0
+
+# Recognitions currently running per cache key; concurrent duplicates await
+# the same task instead of starting their own pipeline
+_inflight_recognitions: Dict[bytes, asyncio.Task] = {}
+_cache_coalesced = 0
+
+
+def _recognition_cache_key(audio_data: Union[bytes, bytearray], language: Optional[str]) -> bytes:
+    """Content hash of an upload, scoped by language hint"""
+    digest = hashlib.blake2b(audio_data, digest_size=16).digest()
+    return digest + (language or "").encode()
+
+
+async def _recognize_and_cache(
+    key: bytes,
+    recognize: Callable[[], Awaitable[Optional[RecognitionResult]]]
+) -> Optional[RecognitionResult]:
+    result = await recognize()
+    # Only matches are cached so misses are retried against fresh data
+    if result:
+        _recognition_cache[key] = result
+    return result
+
+
+async def _recognize_once(
+    key: bytes,
+    recognize: Callable[[], Awaitable[Optional[RecognitionResult]]]
+) -> Optional[RecognitionResult]:
+    """Serve from cache or coalesce onto an in-flight recognition of the same audio"""
+    global _cache_hits, _cache_misses, _cache_coalesced
+    
+    cached = _recognition_cache.get(key)
+    if cached is not None:
+        _cache_hits += 1
+        return cached
+    
+    task = _inflight_recognitions.get(key)
+    if task is not None:
+        _cache_coalesced += 1
+    else:
+        _cache_misses += 1
+        # The work runs in its own task so a disconnecting client only
+        # cancels its own wait, never the recognition others are sharing
+        task = asyncio.ensure_future(_recognize_and_cache(key, recognize))
+        _inflight_recognitions[key] = task
+        task.add_done_callback(lambda _: _inflight_recognitions.pop(key, None))
+        # Mark failures as retrieved when every waiter has gone away
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    return await asyncio.shield(task)
+
+
+def get_recognition_cache_stats() -> Dict[str, Any]:
+    """Recognition cache occupancy and hit/miss counters"""
+    # Coalesced requests skip their own pipeline, so they count toward the hit rate
+    lookups = _cache_hits + _cache_misses + _cache_coalesced
+    return {
+        "size": _recognition_cache.currsize,
+        "maxsize": _recognition_cache.maxsize,
+        "hits": _cache_hits,
+        "misses": _cache_misses,
+        "coalesced": _cache_coalesced,
+        "hit_rate": (_cache_hits + _cache_coalesced) / lookups if lookups else 0.0
+    }
+
+
+def _oversize_response(batch_logger: BatchLogger, request_id: str, start_ns: int):
+    """Prebuilt 413 that still reaches the error log the exception handlers write"""
+    batch_logger.enqueue_error(
+        error=_OVERSIZE_DETAIL,
+        processing_time_ms=(time.perf_counter_ns() - start_ns) // 1_000_000,
+        request_id=request_id
+    )
+    return prebuilt_error_response(_ERROR_BODIES[413], 413)
+
+
+def _check_duration(duration: Optional[float]) -> None:
+    """Reject audio outside the allowed duration range"""
+    if duration is None:
+        return
+    
+    if duration < MIN_AUDIO_DURATION:
+        raise AudioTooShortError(
+            duration=duration,
+            minimum=MIN_AUDIO_DURATION
+        )
+    
+    if duration > MAX_AUDIO_DURATION:
+        raise AudioTooLongError(
+            duration=duration,
+            maximum=MAX_AUDIO_DURATION
+        )
+
 
 @router.post("/", response_model=RecognitionResponse)
 async def recognize_music(
+    http_request: Request,
     audio_file: UploadFile = File(...),
     format: Optional[str] = Form(None),
     duration: Optional[int] = Form(None),
     language: Optional[str] = Form("auto"),
-    audio_service: AudioService = Depends(),
-    recognition_service: RecognitionService = Depends()
+    audio_service: AudioService = Depends(get_audio_service),
+    recognition_service: RecognitionService = Depends(get_recognition_service),
+    batch_logger: BatchLogger = Depends(get_batch_logger)
 ):
     """
     Recognize music from uploaded audio file
@@ -41,133 +191,127 @@ async def recognize_music(
     - **duration**: Recording duration in seconds
     - **language**: Language hint for recognition (hi, en, auto)
     """
-    start_time = time.time()
-    request_id = str(uuid.uuid4())
+    # Set by the request context middleware in main
+    request_id = http_request.state.request_id
+    start_ns = http_request.state.start_ns
     
-    try:
-        # Validate audio file
-        if not audio_file.content_type or not audio_file.content_type.startswith("audio/"):
-            raise InvalidAudioFormatError(
-                format=audio_file.content_type or "unknown",
-                supported_formats=["audio/mpeg", "audio/wav", "audio/flac", "audio/aac", "audio/ogg"]
-            )
-        
-        # Read audio data
-        audio_data = await audio_file.read()
-        
-        if len(audio_data) > settings.MAX_AUDIO_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Audio file too large. Maximum size: {settings.MAX_AUDIO_SIZE / (1024*1024):.1f}MB"
-            )
-        
-        # Validate audio format and duration
-        audio_info = await validate_audio_file(audio_data, audio_file.content_type)
-        
-        if audio_info.duration < settings.MIN_AUDIO_DURATION:
-            raise AudioTooShortError(
-                duration=audio_info.duration,
-                minimum=settings.MIN_AUDIO_DURATION
-            )
-        
-        if audio_info.duration > settings.MAX_AUDIO_DURATION:
-            raise AudioTooLongError(
-                duration=audio_info.duration,
-                maximum=settings.MAX_AUDIO_DURATION
-            )
-        
+    # Validate audio file
+    content_type = audio_file.content_type
+    if content_type not in SUPPORTED_AUDIO_FORMATS:
+        raise InvalidAudioFormatError(
+            format=content_type or "unknown",
+            supported_formats=SUPPORTED_AUDIO_FORMATS_LIST
+        )
+    
+    # The multipart parser records the size of every spooled upload
+    if audio_file.size > MAX_AUDIO_SIZE:
+        return _oversize_response(batch_logger, request_id, start_ns)
+    
+    # Reject clips whose container header already shows a bad duration
+    # before consuming the rest of the body
+    header = await audio_file.read(HEADER_PROBE_SIZE)
+    _check_duration(probe_duration_from_header(header, content_type, audio_file.size))
+    await audio_file.seek(0)
+    
+    # Read the spooled upload once; in-memory spools skip the threadpool
+    audio_data = await audio_file.read()
+    
+    # Validate audio format and duration while hashing the body for the
+    # result cache; both release the GIL in their worker threads
+    audio_info, cache_key = await asyncio.gather(
+        to_thread.run_sync(
+            validate_audio_file_sync,
+            audio_data,
+            content_type,
+            limiter=_get_validate_limiter()
+        ),
+        to_thread.run_sync(_recognition_cache_key, audio_data, language)
+    )
+    _check_duration(audio_info.duration)
+    
+    async def run_recognition() -> Optional[RecognitionResult]:
         # Process audio for recognition
         processed_audio = await audio_service.process_audio(audio_data, audio_info)
         
         # Perform recognition
-        recognition_result = await recognition_service.recognize(
+        return await recognition_service.recognize(
             processed_audio,
             language=language,
             request_id=request_id
         )
-        
-        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-        
-        if not recognition_result:
-            raise RecognitionFailedError("No matching song found")
-        
-        # Log recognition result
-        await recognition_service.log_recognition(
-            song_id=recognition_result.song.id,
-            confidence=recognition_result.confidence,
-            processing_time_ms=int(processing_time),
-            request_id=request_id
-        )
-        
-        return RecognitionResponse(
-            success=True,
-            data=recognition_result,
-            metadata={
-                "request_id": request_id,
-                "processing_time_ms": int(processing_time),
-                "audio_duration": audio_info.duration,
-                "audio_quality": audio_info.quality,
-                "api_version": "1.0"
-            }
-        )
-        
-    except Exception as e:
-        processing_time = (time.time() - start_time) * 1000
-        
-        # Log error
-        await recognition_service.log_error(
-            error=str(e),
-            processing_time_ms=int(processing_time),
-            request_id=request_id
-        )
-        
-        raise
+    
+    recognition_result = await _recognize_once(cache_key, run_recognition)
+    
+    processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+    
+    if not recognition_result:
+        raise RecognitionFailedError("No matching song found")
+    
+    # Queue recognition result for the next batched log write
+    batch_logger.enqueue_recognition(
+        song_id=recognition_result.song.id,
+        confidence=recognition_result.confidence,
+        processing_time_ms=processing_time_ms,
+        request_id=request_id
+    )
+    
+    return RecognitionResponse(
+        success=True,
+        data=recognition_result,
+        metadata={
+            "request_id": request_id,
+            "processing_time_ms": processing_time_ms,
+            "audio_duration": audio_info.duration,
+            "audio_quality": audio_info.quality,
+            "api_version": "1.0"
+        }
+    )
 
 
 @router.post("/stream")
 async def recognize_streaming_audio(
     request: RecognitionRequest,
-    recognition_service: RecognitionService = Depends()
+    http_request: Request,
+    recognition_service: RecognitionService = Depends(get_recognition_service)
 ):
     """
     Recognize music from streaming audio data
     
     This endpoint is designed for real-time audio streaming recognition
     """
-    request_id = str(uuid.uuid4())
-    start_time = time.time()
+    # Set by the request context middleware in main
+    request_id = http_request.state.request_id
+    start_ns = http_request.state.start_ns
     
-    try:
-        # Process streaming audio
-        recognition_result = await recognition_service.recognize_streaming(
+    # Streaming keys get their own prefix since only the first window is recognized
+    cache_key = b"stream:" + await to_thread.run_sync(
+        _recognition_cache_key,
+        request.audio_data,
+        request.language
+    )
+    
+    # Process streaming audio
+    recognition_result = await _recognize_once(
+        cache_key,
+        lambda: recognition_service.recognize_streaming(
             request.audio_data,
             request.language,
             request_id
         )
-        
-        processing_time = (time.time() - start_time) * 1000
-        
-        return RecognitionResponse(
-            success=True,
-            data=recognition_result,
-            metadata={
-                "request_id": request_id,
-                "processing_time_ms": int(processing_time),
-                "streaming": True,
-                "api_version": "1.0"
-            }
-        )
-        
-    except Exception as e:
-        processing_time = (time.time() - start_time) * 1000
-        
-        await recognition_service.log_error(
-            error=str(e),
-            processing_time_ms=int(processing_time),
-            request_id=request_id
-        )
-        
-        raise
+    )
+    
+    processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+    
+    return RecognitionResponse(
+        success=True,
+        data=recognition_result,
+        metadata={
+            "request_id": request_id,
+            "processing_time_ms": processing_time_ms,
+            "streaming": True,
+            "api_version": "1.0"
+        }
+    )
 
 
 from app.core.auth import get_current_user
@@ -176,28 +320,41 @@ from app.models.user import User # Assuming you have a user model
 @router.get("/history")
 async def get_recognition_history(
     limit: int = 50,
-    offset: int = 0,
-    recognition_service: RecognitionService = Depends(),
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    recognition_service: RecognitionService = Depends(get_recognition_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get recognition history for the current user
+    
+    - **limit**: Maximum number of recognitions to return (1-200)
+    - **cursor**: Opaque cursor from a previous page's `next_cursor`
+    - **offset**: Deprecated, use `cursor` instead
     """
+    limit = clamp_history_limit(limit)
+    keyset = decode_history_cursor(cursor) if cursor else None
+    
     try:
+        # One extra row tells whether another page exists without a COUNT
         history = await recognition_service.get_recognition_history(
             user_id=current_user.id, # Pass user_id to the service
-            limit=limit,
-            offset=offset
+            limit=limit + 1,
+            cursor=keyset,
+            offset=offset if keyset is None else None
         )
         
+        has_more = len(history) > limit
+        history = history[:limit]
+        
         return {
             "success": True,
             "data": {
                 "recognitions": history,
                 "pagination": {
                     "limit": limit,
-                    "offset": offset,
-                    "has_more": len(history) == limit
+                    "next_cursor": encode_history_cursor(history[-1]) if has_more else None,
+                    "has_more": has_more
                 }
             }
         }
@@ -209,7 +366,7 @@ async def get_recognition_history(
 @router.delete("/history/{recognition_id}")
 async def delete_recognition_history(
     recognition_id: str,
-    recognition_service: RecognitionService = Depends(),
+    recognition_service: RecognitionService = Depends(get_recognition_service),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -3,8 +3,10 @@ Configuration management for Sonica backend
 """
 
 import os
-from typing import Optional, List
-from pydantic import BaseSettings, validator
+from dataclasses import make_dataclass
+from typing import Optional, List, Union
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -16,6 +18,7 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    API_V1_STR: str = "/api/v1"
     
     # Security
     SECRET_KEY: str
@@ -36,14 +39,20 @@ class Settings(BaseSettings):
     AUDIO_ENGINE_TIMEOUT: int = 30
     
     # Vector Database
-    VECTOR_DB_PROVIDER: str = "pinecone"  # or "weaviate"
+    VECTOR_DB_PROVIDER: str = "pinecone"  # or "weaviate", "hnswlib"
     VECTOR_DB_API_KEY: str
     VECTOR_DB_ENVIRONMENT: str = "us-west1-gcp"
     VECTOR_DB_INDEX_NAME: str = "sonica-music"
     VECTOR_DB_DIMENSIONS: int = 1024
+    VECTOR_DB_QUERY_BATCH_SIZE: int = 64
+    VECTOR_DB_QUERY_BATCH_WAIT_MS: int = 8
+    VECTOR_DB_INDEX_PATH: str = "data/sonica-music.hnsw"  # hnswlib only
+    VECTOR_DB_MAX_ELEMENTS: int = 1_000_000  # hnswlib only
+    VECTOR_DB_SAVE_EVERY: int = 1000  # hnswlib only, writes between saves
     
     # Recognition Settings
     RECOGNITION_THRESHOLD: float = 0.8
+    RECOGNITION_MAX_CANDIDATES: int = 10
     MAX_AUDIO_DURATION: int = 30  # seconds
     MIN_AUDIO_DURATION: int = 3   # seconds
     MAX_AUDIO_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -52,8 +61,8 @@ class Settings(BaseSettings):
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
     
-    # CORS
-    CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080"]
+    # CORS (the str arm lets comma-separated env values reach the validator)
+    CORS_ORIGINS: Union[List[str], str] = ["http://localhost:3000", "http://localhost:8080"]
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -72,33 +81,46 @@ class Settings(BaseSettings):
     SPOTIFY_CLIENT_SECRET: Optional[str] = None
     YOUTUBE_API_KEY: Optional[str] = None
     
-    @validator("CORS_ORIGINS", pre=True)
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
+    
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
     def assemble_cors_origins(cls, v):
         if isinstance(v, str):
             return [i.strip() for i in v.split(",")]
         return v
     
-    @validator("DATABASE_URL", pre=True)
+    @field_validator("DATABASE_URL", mode="before")
+    @classmethod
     def validate_database_url(cls, v):
         if not v.startswith(("postgresql://", "postgres://")):
             raise ValueError("DATABASE_URL must be a PostgreSQL URL")
         return v
     
-    @validator("REDIS_URL", pre=True)
+    @field_validator("REDIS_URL", mode="before")
+    @classmethod
     def validate_redis_url(cls, v):
         if not v.startswith("redis://"):
             raise ValueError("REDIS_URL must be a Redis URL")
         return v
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
 
 
+# Validated settings are frozen into a slotted dataclass so hot-path reads
+# are plain attribute loads instead of going through pydantic
+FrozenSettings = make_dataclass(
+    "FrozenSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    frozen=True,
+    slots=True,
+)
+# make_dataclass only takes module= from Python 3.12; without it the class
+# claims to live in "types", which breaks pickling and confuses reprs
+FrozenSettings.__module__ = __name__
+
 # Global settings instance
-settings = Settings()
+settings = FrozenSettings(**Settings().model_dump())
 
 
-def get_settings() -> Settings:
+def get_settings() -> FrozenSettings:
     """Get application settings"""
     return settings
@@ -2,34 +2,48 @@
 Custom exceptions for Sonica API
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Sequence
 
 
 class SonicaException(Exception):
     """Base exception for Sonica API"""
     
+    # Defaults live on the class so subclasses only override what differs
+    status_code: int = 500
+    error_code: str = "INTERNAL_ERROR"
+    
     def __init__(
         self,
         message: str,
-        status_code: int = 500,
-        error_code: str = "INTERNAL_ERROR",
+        status_code: Optional[int] = None,
+        error_code: Optional[str] = None,
         details: Optional[Dict[str, Any]] = None
     ):
         self.message = message
-        self.status_code = status_code
-        self.error_code = error_code
-        self.details = details or {}
+        if status_code is not None:
+            self.status_code = status_code
+        if error_code is not None:
+            self.error_code = error_code
+        self._details = details
         super().__init__(self.message)
+    
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Error details, materialized only when first read"""
+        if self._details is None:
+            self._details = {}
+        return self._details
 
 
 class AudioProcessingError(SonicaException):
     """Audio processing related errors"""
     
+    status_code = 422
+    error_code = "AUDIO_PROCESSING_ERROR"
+    
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(
             message=message,
-            status_code=422,
-            error_code="AUDIO_PROCESSING_ERROR",
             details=details
         )
 
@@ -37,11 +51,12 @@ class AudioProcessingError(SonicaException):
 class InvalidAudioFormatError(SonicaException):
     """Invalid audio format error"""
     
-    def __init__(self, format: str, supported_formats: list):
+    status_code = 400
+    error_code = "INVALID_AUDIO_FORMAT"
+    
+    def __init__(self, format: str, supported_formats: Sequence[str]):
         super().__init__(
             message=f"Unsupported audio format: {format}",
-            status_code=400,
-            error_code="INVALID_AUDIO_FORMAT",
             details={
                 "provided_format": format,
                 "supported_formats": supported_formats
@@ -52,11 +67,12 @@ class InvalidAudioFormatError(SonicaException):
 class AudioTooShortError(SonicaException):
     """Audio duration too short error"""
     
+    status_code = 400
+    error_code = "AUDIO_TOO_SHORT"
+    
     def __init__(self, duration: float, minimum: float):
         super().__init__(
             message=f"Audio duration too short: {duration}s (minimum: {minimum}s)",
-            status_code=400,
-            error_code="AUDIO_TOO_SHORT",
             details={
                 "duration": duration,
                 "minimum": minimum
@@ -67,11 +83,12 @@ class AudioTooShortError(SonicaException):
 class AudioTooLongError(SonicaException):
     """Audio duration too long error"""
     
+    status_code = 400
+    error_code = "AUDIO_TOO_LONG"
+    
     def __init__(self, duration: float, maximum: float):
         super().__init__(
             message=f"Audio duration too long: {duration}s (maximum: {maximum}s)",
-            status_code=400,
-            error_code="AUDIO_TOO_LONG",
             details={
                 "duration": duration,
                 "maximum": maximum
@@ -82,11 +99,12 @@ class AudioTooLongError(SonicaException):
 class RecognitionFailedError(SonicaException):
     """Recognition failed error"""
     
+    status_code = 422
+    error_code = "RECOGNITION_FAILED"
+    
     def __init__(self, reason: str):
         super().__init__(
             message=f"Recognition failed: {reason}",
-            status_code=422,
-            error_code="RECOGNITION_FAILED",
             details={"reason": reason}
         )
 
@@ -94,11 +112,12 @@ class RecognitionFailedError(SonicaException):
 class SongNotFoundError(SonicaException):
     """Song not found error"""
     
+    status_code = 404
+    error_code = "SONG_NOT_FOUND"
+    
     def __init__(self, song_id: str):
         super().__init__(
             message=f"Song not found: {song_id}",
-            status_code=404,
-            error_code="SONG_NOT_FOUND",
             details={"song_id": song_id}
         )
 
@@ -106,11 +125,12 @@ class SongNotFoundError(SonicaException):
 class RateLimitExceededError(SonicaException):
     """Rate limit exceeded error"""
     
+    status_code = 429
+    error_code = "RATE_LIMIT_EXCEEDED"
+    
     def __init__(self, limit: int, window: str):
         super().__init__(
             message=f"Rate limit exceeded: {limit} requests per {window}",
-            status_code=429,
-            error_code="RATE_LIMIT_EXCEEDED",
             details={
                 "limit": limit,
                 "window": window
@@ -121,11 +141,12 @@ class RateLimitExceededError(SonicaException):
 class AuthenticationError(SonicaException):
     """Authentication error"""
     
+    status_code = 401
+    error_code = "AUTHENTICATION_FAILED"
+    
     def __init__(self, reason: str = "Authentication failed"):
         super().__init__(
             message=reason,
-            status_code=401,
-            error_code="AUTHENTICATION_FAILED",
             details={"reason": reason}
         )
 
@@ -133,11 +154,12 @@ class AuthenticationError(SonicaException):
 class AuthorizationError(SonicaException):
     """Authorization error"""
     
+    status_code = 403
+    error_code = "AUTHORIZATION_FAILED"
+    
     def __init__(self, reason: str = "Insufficient permissions"):
         super().__init__(
             message=reason,
-            status_code=403,
-            error_code="AUTHORIZATION_FAILED",
             details={"reason": reason}
         )
 
@@ -145,11 +167,12 @@ class AuthorizationError(SonicaException):
 class DatabaseError(SonicaException):
     """Database error"""
     
+    status_code = 500
+    error_code = "DATABASE_ERROR"
+    
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(
             message=message,
-            status_code=500,
-            error_code="DATABASE_ERROR",
             details=details
         )
 
@@ -157,11 +180,12 @@ class DatabaseError(SonicaException):
 class CacheError(SonicaException):
     """Cache error"""
     
+    status_code = 500
+    error_code = "CACHE_ERROR"
+    
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(
             message=message,
-            status_code=500,
-            error_code="CACHE_ERROR",
             details=details
         )
 
@@ -169,11 +193,12 @@ class CacheError(SonicaException):
 class VectorDatabaseError(SonicaException):
     """Vector database error"""
     
+    status_code = 500
+    error_code = "VECTOR_DATABASE_ERROR"
+    
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(
             message=message,
-            status_code=500,
-            error_code="VECTOR_DATABASE_ERROR",
             details=details
         )
 
@@ -181,11 +206,12 @@ class VectorDatabaseError(SonicaException):
 class ExternalAPIError(SonicaException):
     """External API error"""
     
+    status_code = 502
+    error_code = "EXTERNAL_API_ERROR"
+    
     def __init__(self, service: str, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(
             message=f"{service} API error: {message}",
-            status_code=502,
-            error_code="EXTERNAL_API_ERROR",
             details={
                 "service": service,
                 "message": message,
@@ -0,0 +1,42 @@
+"""
+Response classes for Sonica API
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+    
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def build_error_body(code: str, message: str, status_code: int) -> bytes:
+    """
+    Serialize a fixed error payload once, in the exception handler shape
+    
+    Per-request fields (request_id, timestamp) are left out since the
+    bytes are shared by every response.
+    """
+    return orjson.dumps({
+        "success": False,
+        "error": {
+            "code": code,
+            "message": message,
+            "status_code": status_code
+        }
+    })
+
+
+def prebuilt_error_response(body: bytes, status_code: int) -> Response:
+    """Wrap a pre-serialized error body without going through an exception handler"""
+    return Response(content=body, status_code=status_code, media_type="application/json")
@@ -0,0 +1,267 @@
+"""
+In-process HNSW index used as a local vector database backend
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, List, Optional, Dict, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def vector_label(vector_id: str) -> int:
+    """Stable non-negative 63-bit integer label for a string vector ID"""
+    digest = hashlib.blake2b(vector_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & 0x7FFFFFFFFFFFFFFF
+
+
+def _matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Equality filter over metadata fields, mirroring simple Pinecone filters"""
+    if not filter:
+        return True
+    return all(metadata.get(key) == value for key, value in filter.items())
+
+
+class LocalHNSWIndex:
+    """Cosine HNSW indexes, one per namespace, with a metadata side table"""
+    
+    def __init__(
+        self,
+        dimensions: int,
+        path: str,
+        max_elements: int = 100_000,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        save_every: int = 1000
+    ):
+        self.dimensions = dimensions
+        self.path = path
+        self.max_elements = max_elements
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.save_every = save_every
+        
+        # Namespaces are searched in their own graphs so a small language
+        # shard gets full top_k recall instead of what survives a filter;
+        # None and "" share the default namespace
+        self.indexes: Dict[str, Any] = {}
+        self.labels: Dict[str, set] = {}
+        
+        # label -> {"id", "namespace", "metadata"}
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        
+        # Upserted or deleted vectors not yet written to disk
+        self._unsaved = 0
+    
+    @property
+    def _metadata_path(self) -> str:
+        return f"{self.path}.meta.json"
+    
+    def _index_path(self, position: int) -> str:
+        return f"{self.path}.{position}"
+    
+    def _new_index(self, capacity: int) -> Any:
+        import hnswlib
+        
+        index = hnswlib.Index(space="cosine", dim=self.dimensions)
+        index.init_index(max_elements=capacity, M=self.m, ef_construction=self.ef_construction)
+        index.set_ef(self.ef_search)
+        return index
+    
+    def _namespace_index(self, namespace: str, required: int) -> Any:
+        """Index of a namespace, created or grown to hold required vectors"""
+        index = self.indexes.get(namespace)
+        if index is None:
+            # Shards start small and double as they fill
+            index = self._new_index(max(min(self.max_elements, 16_384), required))
+            self.indexes[namespace] = index
+            self.labels[namespace] = set()
+        elif required > index.get_max_elements():
+            index.resize_index(max(required, index.get_max_elements() * 2))
+        return index
+    
+    def load(self) -> None:
+        """Load previously saved indexes and their metadata, if present"""
+        # Without the side table labels cannot be mapped back to IDs, so
+        # start empty and let the index be rebuilt from fresh upserts
+        if not os.path.exists(self._metadata_path):
+            if glob.glob(f"{glob.escape(self.path)}.[0-9]*"):
+                logger.warning(
+                    f"Local HNSW index {self.path} has no metadata file, starting with an empty index"
+                )
+            return
+        
+        with open(self._metadata_path, "r") as f:
+            saved = json.load(f)
+        
+        import hnswlib
+        
+        for position, namespace in enumerate(saved["namespaces"]):
+            index = hnswlib.Index(space="cosine", dim=self.dimensions)
+            index.load_index(self._index_path(position))
+            index.set_ef(self.ef_search)
+            self.indexes[namespace] = index
+            self.labels[namespace] = set()
+        
+        self.entries = {int(label): entry for label, entry in saved["entries"].items()}
+        for label, entry in self.entries.items():
+            self.labels[entry["namespace"] or ""].add(label)
+        
+        logger.info(
+            f"Loaded local HNSW index with {len(self.entries)} vectors "
+            f"in {len(self.indexes)} namespaces from {self.path}"
+        )
+    
+    def save(self) -> None:
+        """Persist the indexes and their metadata side table"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Write every file aside first so a crash mid-save keeps the old set
+        namespaces = list(self.indexes)
+        for position, namespace in enumerate(namespaces):
+            self.indexes[namespace].save_index(f"{self._index_path(position)}.tmp")
+        with open(f"{self._metadata_path}.tmp", "w") as f:
+            json.dump({"namespaces": namespaces, "entries": self.entries}, f)
+        
+        for position in range(len(namespaces)):
+            os.replace(f"{self._index_path(position)}.tmp", self._index_path(position))
+        os.replace(f"{self._metadata_path}.tmp", self._metadata_path)
+        self._unsaved = 0
+    
+    def _note_writes(self, count: int) -> None:
+        """Save once enough writes have accumulated since the last save"""
+        self._unsaved += count
+        if self.save_every and self._unsaved >= self.save_every:
+            self.save()
+    
+    def _remove(self, label: int) -> Optional[Dict[str, Any]]:
+        """Drop a label from its namespace graph and the side table"""
+        entry = self.entries.pop(label, None)
+        if entry is not None:
+            namespace = entry["namespace"] or ""
+            self.indexes[namespace].mark_deleted(label)
+            self.labels[namespace].discard(label)
+        return entry
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None) -> None:
+        """Insert or replace vectors given in Pinecone upsert form"""
+        if not vectors:
+            return
+        
+        key = namespace or ""
+        labels = np.array([vector_label(vector["id"]) for vector in vectors], dtype=np.int64)
+        data = np.vstack([np.asarray(vector["values"], dtype=np.float32) for vector in vectors])
+        
+        # A vector moving to another namespace leaves its old graph
+        for label in labels.tolist():
+            entry = self.entries.get(label)
+            if entry is not None and (entry["namespace"] or "") != key:
+                self._remove(label)
+        
+        index = self.indexes.get(key)
+        current = index.get_current_count() if index is not None else 0
+        index = self._namespace_index(key, current + len(vectors))
+        
+        # Re-adding an existing label replaces its vector
+        index.add_items(data, labels, replace_deleted=False)
+        
+        for label, vector in zip(labels.tolist(), vectors):
+            self.entries[label] = {
+                "id": vector["id"],
+                "namespace": namespace,
+                "metadata": vector.get("metadata", {})
+            }
+            self.labels[key].add(label)
+        
+        self._note_writes(len(vectors))
+    
+    def _exact_query(
+        self,
+        index: Any,
+        queries: np.ndarray,
+        labels: List[int],
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force cosine top-k over the given labels"""
+        candidates = np.asarray(index.get_items(labels), dtype=np.float32)
+        candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+        normalized = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        
+        distances = 1.0 - normalized @ candidates.T
+        order = np.argsort(distances, axis=1)[:, :k]
+        return np.asarray(labels)[order], np.take_along_axis(distances, order, axis=1)
+    
+    def query_batch(
+        self,
+        query_vectors: List[List[float]],
+        top_k: int = 10,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Top-k cosine matches per query within a namespace, filtered by metadata"""
+        key = namespace or ""
+        index = self.indexes.get(key)
+        
+        # Metadata filters are applied inside the graph search, so k counts
+        # only vectors that pass them
+        allowed: List[int] = list(self.labels.get(key, ()))
+        label_filter: Optional[Callable[[int], bool]] = None
+        if filter:
+            allowed = [label for label in allowed if _matches_filter(self.entries[label]["metadata"], filter)]
+            allowed_set = set(allowed)
+            label_filter = allowed_set.__contains__
+        
+        k = min(top_k, len(allowed))
+        if index is None or k == 0:
+            return [[] for _ in query_vectors]
+        
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dimensions)
+        try:
+            labels, distances = index.knn_query(queries, k=k, filter=label_filter)
+        except RuntimeError:
+            # The graph walk found fewer than k allowed vectors; small or
+            # heavily filtered shards are cheap to search exhaustively
+            labels, distances = self._exact_query(index, queries, allowed, k)
+        
+        return [
+            [
+                {
+                    "id": self.entries[label]["id"],
+                    "score": 1.0 - distance,
+                    "metadata": self.entries[label]["metadata"]
+                }
+                for label, distance in zip(row_labels, row_distances)
+            ]
+            for row_labels, row_distances in zip(labels.tolist(), distances.tolist())
+        ]
+    
+    def delete(self, ids: List[str]) -> None:
+        """Remove vectors by ID"""
+        removed = 0
+        for vector_id in ids:
+            if self._remove(vector_label(vector_id)) is not None:
+                removed += 1
+        
+        self._note_writes(removed)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Index statistics in the describe_index_stats shape"""
+        return {
+            "namespaces": {
+                namespace: {"vector_count": len(labels)}
+                for namespace, labels in self.labels.items()
+                if labels
+            },
+            "total_vector_count": len(self.entries),
+            "dimension": self.dimensions,
+            "index_fullness": len(self.entries) / self.max_elements
+        }
@@ -0,0 +1,191 @@
+"""
+Batched recognition logging to coalesce per-request database writes
+"""
+
+import asyncio
+import logging
+from typing import Optional, List, Dict, Any, Tuple
+from uuid import UUID
+
+from app.services.database_service import DatabaseService, get_database_service
+
+logger = logging.getLogger(__name__)
+
+RECOGNITION = "recognition"
+ERROR = "error"
+
+# Queued by stop() so the drain task flushes everything ahead of it and exits
+_STOP = object()
+
+
+class BatchLogger:
+    """Queues recognition log rows and writes them in multi-row inserts"""
+    
+    def __init__(
+        self,
+        database_service: DatabaseService,
+        max_batch: int = 128,
+        flush_interval: float = 0.05,
+        max_queue: int = 10000,
+        stop_timeout: float = 10.0
+    ):
+        self.database_service = database_service
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.stop_timeout = stop_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+    
+    def _enqueue(self, kind: str, row: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait((kind, row))
+        except asyncio.QueueFull:
+            logger.warning(f"Recognition log queue full, dropping {kind} row")
+    
+    def enqueue_recognition(
+        self,
+        song_id: UUID,
+        confidence: float,
+        processing_time_ms: int,
+        request_id: Optional[str] = None
+    ) -> None:
+        """Queue a recognition result for the next batch write"""
+        self._enqueue(RECOGNITION, {
+            "song_id": song_id,
+            "confidence": confidence,
+            "processing_time_ms": processing_time_ms,
+            "request_id": request_id
+        })
+    
+    def enqueue_error(
+        self,
+        error: str,
+        processing_time_ms: int,
+        request_id: Optional[str] = None
+    ) -> None:
+        """Queue a recognition error for the next batch write"""
+        self._enqueue(ERROR, {
+            "error": error,
+            "processing_time_ms": processing_time_ms,
+            "request_id": request_id
+        })
+    
+    async def _collect(self, window: float) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """
+        Wait for one row, then gather more until the batch or window is full
+        
+        Returns the batch and whether the stop sentinel ended it
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+        items: List[Tuple[str, Dict[str, Any]]] = []
+        item = await self.queue.get()
+        
+        while True:
+            if item is _STOP:
+                return items, True
+            items.append(item)
+            if len(items) >= self.max_batch:
+                break
+            
+            # Take whatever is already queued before waiting out the window
+            try:
+                item = self.queue.get_nowait()
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+        
+        return items, False
+    
+    async def _write(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        recognitions = [row for kind, row in items if kind == RECOGNITION]
+        errors = [row for kind, row in items if kind == ERROR]
+        
+        try:
+            if recognitions:
+                await self.database_service.log_recognitions_batch(recognitions)
+            if errors:
+                await self.database_service.log_recognition_errors_batch(errors)
+        except Exception as e:
+            logger.error(f"Failed to write {len(items)} recognition log rows: {e}")
+    
+    async def _flush_batch(self, window: float) -> bool:
+        """Collect and write one batch; True once the stop sentinel is reached"""
+        items, stopped = await self._collect(window)
+        if items:
+            await self._write(items)
+        return stopped
+    
+    async def _run(self) -> None:
+        while not await self._flush_batch(self.flush_interval):
+            pass
+    
+    async def _drain(self) -> None:
+        """Queue the stop sentinel and wait for the task to flush up to it"""
+        await self.queue.put(_STOP)
+        await asyncio.gather(self._task, return_exceptions=True)
+    
+    def start(self) -> None:
+        """Start the background drain task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Let the drain task flush what is queued, cancelling it only on timeout"""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._drain(), self.stop_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Recognition log drain did not finish in {self.stop_timeout}s, cancelling")
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        
+        # Rows queued after the sentinel, or left behind by a cancelled
+        # drain, go through the same batching without waiting for more
+        while not self.queue.empty():
+            await self._flush_batch(0)
+
+
+# Global batch logger instance
+_batch_logger: Optional[BatchLogger] = None
+
+
+async def start_batch_logger() -> BatchLogger:
+    """Create and start the batch logger"""
+    global _batch_logger
+    
+    if _batch_logger is None:
+        _batch_logger = BatchLogger(await get_database_service())
+        _batch_logger.start()
+    
+    return _batch_logger
+
+
+def get_batch_logger() -> BatchLogger:
+    """Get the running batch logger"""
+    if _batch_logger is None:
+        raise RuntimeError("Batch logger has not been started")
+    return _batch_logger
+
+
+def find_batch_logger() -> Optional[BatchLogger]:
+    """Get the running batch logger, or None if it has not been started"""
+    return _batch_logger
+
+
+async def stop_batch_logger() -> None:
+    """Flush and stop the batch logger"""
+    global _batch_logger
+    
+    if _batch_logger:
+        await _batch_logger.stop()
+        _batch_logger = None
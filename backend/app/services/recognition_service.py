@@ -4,10 +4,13 @@ Recognition service for music identification using vector database
 
 import time
 import logging
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 import asyncio
 
+from cachetools import TTLCache
+
 from app.core.config import settings
 from app.core.exceptions import RecognitionError, AudioProcessingError, VectorDatabaseError
 from app.models.recognition import RecognitionResult, SongInfo
@@ -17,6 +20,9 @@ from app.services.vector_service import get_vector_service, VectorDatabaseServic
 
 logger = logging.getLogger(__name__)
 
+# Songs fingerprinted concurrently by batch_add_songs
+BATCH_ADD_CONCURRENCY = 16
+
 
 class RecognitionService:
     """Service for music recognition using vector database"""
@@ -30,7 +36,21 @@ class RecognitionService:
         self.audio_service = audio_service
         self.database_service = database_service
         self.vector_service = vector_service
-        self.recognition_cache = {}  # Simple in-memory cache
+        # Song lookups are cached per process; the TTL bounds how long an
+        # updated or deleted song can be served stale
+        self.song_cache: TTLCache = TTLCache(maxsize=100_000, ttl=300)
+    
+    async def _get_songs(self, song_ids: List[UUID]) -> Dict[UUID, Any]:
+        """Fetch songs by ID, going to the database only for uncached ones"""
+        songs = {song_id: self.song_cache[song_id] for song_id in song_ids if song_id in self.song_cache}
+        missing = [song_id for song_id in song_ids if song_id not in songs]
+        
+        if missing:
+            for song in await self.database_service.get_songs(missing):
+                self.song_cache[song.id] = song
+                songs[song.id] = song
+        
+        return songs
     
     async def recognize(
         self,
@@ -68,56 +88,55 @@ class RecognitionService:
                 logger.info(f"No similar fingerprints found for request {request_id}")
                 return None
             
-            # Find the best match above threshold
+            # Candidates above threshold, highest score first
+            candidates = []
+            for result in sorted(vector_results, key=lambda result: result.get("score", 0.0), reverse=True):
+                if result.get("score", 0.0) <= settings.RECOGNITION_THRESHOLD:
+                    break
+                
+                # Extract song ID from metadata
+                song_id_str = result.get("metadata", {}).get("song_id")
+                if not song_id_str:
+                    continue
+                
+                try:
+                    candidates.append((UUID(song_id_str), result["score"]))
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Invalid song ID in vector result: {song_id_str}, error: {e}")
+            
+            # Fetch uncached candidate songs in one query, then take the best that exists
+            songs = await self._get_songs([song_id for song_id, _ in candidates])
+            
             best_match = None
-            best_score = 0.0
             
-            for result in vector_results:
-                score = result.get("score", 0.0)
-                
-                if score > settings.RECOGNITION_THRESHOLD and score > best_score:
-                    # Extract song ID from metadata
-                    metadata = result.get("metadata", {})
-                    song_id_str = metadata.get("song_id")
-                    
-                    if song_id_str:
-                        try:
-                            song_id = UUID(song_id_str)
-                            song = await self.database_service.get_song(song_id)
-                            
-                            if song:
-                                best_score = score
-                                best_match = RecognitionResult(
-                                    song=SongInfo(
-                                        id=song.id,
-                                        title=song.title,
-                                        artist=song.artist,
-                                        album=song.album,
-                                        genre=song.genre,
-                                        language=song.language,
-                                        duration=song.duration,
-                                        release_date=song.release_date,
-                                        popularity_score=song.popularity_score,
-                                        spotify_id=song.spotify_id,
-                                        youtube_id=song.youtube_id
-                                    ),
-                                    confidence=score,
-                                    match_type="vector_similarity",
-                                    processing_time_ms=int((time.time() - start_time) * 1000)
-                                )
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Invalid song ID in vector result: {song_id_str}, error: {e}")
-                            continue
+            for song_id, score in candidates:
+                song = songs.get(song_id)
+                if song:
+                    best_match = RecognitionResult(
+                        song=SongInfo(
+                            id=song.id,
+                            title=song.title,
+                            artist=song.artist,
+                            album=song.album,
+                            genre=song.genre,
+                            language=song.language,
+                            duration=song.duration,
+                            release_date=song.release_date,
+                            popularity_score=song.popularity_score,
+                            spotify_id=song.spotify_id,
+                            youtube_id=song.youtube_id
+                        ),
+                        confidence=score,
+                        match_type="vector_similarity",
+                        processing_time_ms=int((time.time() - start_time) * 1000)
+                    )
+                    break
             
             if best_match:
                 logger.info(
                     f"Recognition successful for request {request_id}: "
                     f"song_id={best_match.song.id}, confidence={best_match.confidence:.3f}"
                 )
-                
-                # Cache the result
-                if request_id:
-                    self.recognition_cache[request_id] = best_match
             
             return best_match
             
@@ -141,15 +160,18 @@ class RecognitionService:
         """
         # For streaming, we use a smaller window and faster processing
         try:
-            # Process audio in chunks for streaming
-            chunk_size = 1024 * 1024  # 1MB chunks
-            audio_chunks = [audio_data[i:i+chunk_size] for i in range(0, len(audio_data), chunk_size)]
+            chunk_size = 1024 * 1024  # 1MB window
+            
+            if not audio_data:
+                return None
             
-            # Process the first chunk for quick recognition
-            if audio_chunks:
-                return await self.recognize(audio_chunks[0], language, request_id)
+            # Process only the first window for quick recognition, copying
+            # just that window instead of slicing the whole payload
+            head = audio_data
+            if len(audio_data) > chunk_size:
+                head = bytes(memoryview(audio_data)[:chunk_size])
             
-            return None
+            return await self.recognize(head, language, request_id)
             
         except Exception as e:
             logger.error(f"Streaming recognition failed for request {request_id}: {e}")
@@ -215,32 +237,33 @@ class RecognitionService:
             List of created song UUIDs
         """
         try:
-            created_songs = []
+            # Create all songs in one multi-row insert
+            created_songs = await self.database_service.bulk_create_songs(songs_data)
             
-            # Prepare batch data for vector database
-            vector_batch = []
+            semaphore = asyncio.Semaphore(BATCH_ADD_CONCURRENCY)
             
-            for song_data in songs_data:
-                # Create song in database
-                song_id = await self.database_service.create_song(song_data)
-                created_songs.append(song_id)
+            async def fingerprint_one(song_id: UUID, song_data: Dict[str, Any]) -> tuple:
+                async with semaphore:
+                    fingerprint_data = await self.audio_service.generate_fingerprint(song_data["audio_data"])
                 
-                # Generate fingerprint
-                audio_data = song_data.get("audio_data")
-                if audio_data:
-                    fingerprint_data = await self.audio_service.generate_fingerprint(audio_data)
-                    
-                    # Prepare metadata
-                    metadata = {
-                        "title": song_data.get("title", ""),
-                        "artist": song_data.get("artist", ""),
-                        "language": song_data.get("language", "en"),
-                        "genre": song_data.get("genre", ""),
-                        "album": song_data.get("album", ""),
-                        "popularity_score": song_data.get("popularity_score", 0.0)
-                    }
-                    
-                    vector_batch.append((song_id, fingerprint_data, metadata))
+                # Prepare metadata
+                metadata = {
+                    "title": song_data.get("title", ""),
+                    "artist": song_data.get("artist", ""),
+                    "language": song_data.get("language", "en"),
+                    "genre": song_data.get("genre", ""),
+                    "album": song_data.get("album", ""),
+                    "popularity_score": song_data.get("popularity_score", 0.0)
+                }
+                
+                return song_id, fingerprint_data, metadata
+            
+            # Fingerprint songs that came with audio concurrently
+            vector_batch = await asyncio.gather(*(
+                fingerprint_one(song_id, song_data)
+                for song_id, song_data in zip(created_songs, songs_data)
+                if song_data.get("audio_data")
+            ))
             
             # Batch upsert to vector database
             if vector_batch:
@@ -255,13 +278,26 @@ class RecognitionService:
     
     async def get_recognition_history(
         self,
+        user_id: UUID,
         limit: int = 50,
-        offset: int = 0
+        cursor: Optional[Tuple[datetime, str]] = None,
+        offset: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get recognition history from database"""
+        """
+        Get recognition history from database, newest first
+        
+        Args:
+            user_id: Owner of the history
+            limit: Maximum number of rows to return
+            cursor: (created_at, id) of the last row of the previous page;
+                rows strictly older than it are returned
+            offset: Deprecated OFFSET-based paging, used only without a cursor
+        """
         try:
             return await self.database_service.get_recognition_history(
+                user_id=user_id,
                 limit=limit,
+                cursor=cursor,
                 offset=offset
             )
         except Exception as e:
@@ -345,18 +381,33 @@ class RecognitionService:
             }
 
 
+# Global recognition service instance
+_recognition_service: Optional[RecognitionService] = None
+_recognition_service_lock = asyncio.Lock()
+
+
 # Dependency injection
 async def get_recognition_service() -> RecognitionService:
-    """Get recognition service instance with dependencies"""
-    from app.services.audio_service import get_audio_service
-    from app.services.database_service import get_database_service
+    """Get or create the recognition service instance with dependencies"""
+    global _recognition_service
+    
+    if _recognition_service is not None:
+        return _recognition_service
     
-    audio_service = await get_audio_service()
-    database_service = await get_database_service()
-    vector_service = await get_vector_service()
+    # Concurrent first requests would otherwise each build a service
+    async with _recognition_service_lock:
+        if _recognition_service is None:
+            from app.services.audio_service import get_audio_service
+            from app.services.database_service import get_database_service
+            
+            audio_service = await get_audio_service()
+            database_service = await get_database_service()
+            vector_service = await get_vector_service()
+            
+            _recognition_service = RecognitionService(
+                audio_service=audio_service,
+                database_service=database_service,
+                vector_service=vector_service
+            )
     
-    return RecognitionService(
-        audio_service=audio_service,
-        database_service=database_service,
-        vector_service=vector_service
-    )
+    return _recognition_service
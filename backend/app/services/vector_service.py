@@ -3,16 +3,315 @@ Vector database service for ultra-fast similarity search
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Union
 import httpx
+import numpy as np
 import json
+import orjson
+from cachetools import TTLCache
 from uuid import UUID
 from app.core.config import settings
 from app.core.exceptions import VectorDatabaseError
+from app.services.hnsw_index import LocalHNSWIndex
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 logger = logging.getLogger(__name__)
 
+# Language hints that mean "search every namespace"
+ANY_LANGUAGE = frozenset({"", "auto"})
+
+# Fingerprints stored before language sharding live in the default namespace
+DEFAULT_NAMESPACE = ""
+
+# How long a worker trusts its namespace list before re-reading index stats,
+# so languages added through other workers become searchable
+NAMESPACE_REFRESH_SECONDS = 30.0
+
+
+@dataclass
+class Fingerprint:
+    """Audio fingerprint peaks as contiguous float32 columns"""
+    
+    freq: np.ndarray
+    time: np.ndarray
+    mag: np.ndarray
+    duration: float = 1.0
+    
+    @classmethod
+    def from_legacy(cls, fingerprint_data: Dict[str, Any]) -> "Fingerprint":
+        """Build from the legacy {"peaks": [...], "metadata": {...}} dict form"""
+        peaks = fingerprint_data.get("peaks", [])
+        columns = np.array(
+            [
+                (peak.get("frequency", 0.0), peak.get("time", 0.0), peak.get("magnitude", 0.0))
+                for peak in peaks
+            ],
+            dtype=np.float32
+        ).reshape(-1, 3)
+        
+        return cls(
+            freq=np.ascontiguousarray(columns[:, 0]),
+            time=np.ascontiguousarray(columns[:, 1]),
+            mag=np.ascontiguousarray(columns[:, 2]),
+            duration=fingerprint_data.get("metadata", {}).get("duration", 1.0)
+        )
+
+
+# Accepted fingerprint inputs; the dict form is kept for one release
+FingerprintInput = Union[Fingerprint, Dict[str, Any]]
+
+
+def as_fingerprint(fingerprint_data: FingerprintInput) -> Fingerprint:
+    """Normalize a fingerprint input to the SoA Fingerprint form"""
+    if isinstance(fingerprint_data, Fingerprint):
+        return fingerprint_data
+    return Fingerprint.from_legacy(fingerprint_data)
+
+
+def _normalize_histogram(histogram: np.ndarray) -> np.ndarray:
+    """Scale a histogram so its largest bin is 1"""
+    max_value = histogram.max()
+    if max_value > 0:
+        histogram /= max_value
+    return histogram
+
+
+# Frequency histogram bin for every integer Hz up to the 20kHz ceiling
+MAX_FREQUENCY_HZ = 20000
+_FREQ_BIN_LUT = np.minimum(np.arange(MAX_FREQUENCY_HZ + 1) * 20 // MAX_FREQUENCY_HZ, 19).astype(np.intp)
+
+
+def _vectorize_kernel(
+    freq: np.ndarray,
+    time: np.ndarray,
+    mag: np.ndarray,
+    freq_lut: np.ndarray,
+    duration: float,
+    dimensions: int
+) -> np.ndarray:
+    """Both histograms and the magnitude stats fused into one pass over the peaks"""
+    freq_bins = 20
+    time_bins = 10
+    
+    vector = np.zeros(dimensions, dtype=np.float32)
+    n = mag.shape[0]
+    if n == 0:
+        return vector
+    
+    freq_histogram = np.zeros(freq_bins, dtype=np.float64)
+    time_histogram = np.zeros(time_bins, dtype=np.float64)
+    max_freq = freq_lut.shape[0] - 1
+    time_scale = time_bins / duration
+    total = 0.0
+    high = mag[0]
+    low = mag[0]
+    
+    for i in range(n):
+        magnitude = mag[i]
+        fb = freq_lut[min(max(int(freq[i]), 0), max_freq)]
+        tb = min(max(int(time[i] * time_scale), 0), time_bins - 1)
+        freq_histogram[fb] += magnitude
+        time_histogram[tb] += magnitude
+        total += magnitude
+        high = max(high, magnitude)
+        low = min(low, magnitude)
+    
+    # Normalize and pack [freq | time | mean, max, min], truncated to dimensions
+    freq_max = freq_histogram.max()
+    time_max = time_histogram.max()
+    pos = 0
+    for j in range(freq_bins):
+        if pos < dimensions:
+            vector[pos] = freq_histogram[j] / freq_max if freq_max > 0 else freq_histogram[j]
+        pos += 1
+    for j in range(time_bins):
+        if pos < dimensions:
+            vector[pos] = time_histogram[j] / time_max if time_max > 0 else time_histogram[j]
+        pos += 1
+    stats = np.empty(3, dtype=np.float64)
+    stats[0] = total / n
+    stats[1] = high
+    stats[2] = low
+    for j in range(3):
+        if pos < dimensions:
+            vector[pos] = stats[j]
+        pos += 1
+    
+    return vector
+
+
+# JIT-compiled kernel; the NumPy path below is used when numba is unavailable
+_vectorize_numba = (
+    njit(cache=True, fastmath=True, boundscheck=False)(_vectorize_kernel)
+    if njit is not None else None
+)
+
+
+def compute_fingerprint_vector(fingerprint: Fingerprint, dimensions: int) -> np.ndarray:
+    """Convert a fingerprint to a float32 vector representation"""
+    if _vectorize_numba is not None:
+        return _vectorize_numba(
+            fingerprint.freq,
+            fingerprint.time,
+            fingerprint.mag,
+            _FREQ_BIN_LUT,
+            float(fingerprint.duration),
+            dimensions
+        )
+    
+    freq_bins = 20
+    time_bins = 10
+    
+    magnitudes = fingerprint.mag
+    has_peaks = magnitudes.size > 0
+    
+    parts = []
+    
+    if has_peaks:
+        # Frequency distribution, magnitude weighted
+        freq_idx = _FREQ_BIN_LUT[np.clip(fingerprint.freq, 0, MAX_FREQUENCY_HZ).astype(np.int32)]
+        freq_histogram = np.bincount(freq_idx, weights=magnitudes, minlength=freq_bins)
+        parts.append(_normalize_histogram(freq_histogram))
+    
+    # Time distribution, magnitude weighted
+    time_idx = np.clip((fingerprint.time * (time_bins / fingerprint.duration)).astype(np.int64), 0, time_bins - 1)
+    time_histogram = np.bincount(time_idx, weights=magnitudes, minlength=time_bins)
+    parts.append(_normalize_histogram(time_histogram))
+    
+    # Statistical features
+    if has_peaks:
+        parts.append(np.array([magnitudes.mean(), magnitudes.max(), magnitudes.min()]))
+    
+    vector = np.zeros(dimensions, dtype=np.float32)
+    features = np.concatenate(parts)[:dimensions]
+    vector[:features.size] = features
+    
+    return vector
+
+
+def _search_cache_key(
+    vector: np.ndarray,
+    top_k: int,
+    language: Optional[str],
+    genre: Optional[str]
+) -> tuple:
+    """
+    Search cache key for a query vector
+    
+    The vector is bucketed to 8-bit codes over its own value range before
+    hashing, so near-identical queries share an entry. Stored vectors stay
+    float32; the codes only exist for this key.
+    """
+    offset = float(vector.min()) if vector.size else 0.0
+    value_range = float(vector.max()) - offset if vector.size else 0.0
+    scale = value_range / 255 if value_range > 0 else 1.0
+    codes = np.clip(np.rint((vector - offset) / scale), 0, 255).astype(np.uint8)
+    return (hashlib.blake2b(codes.tobytes(), digest_size=16).digest(), top_k, language, genre)
+
+
+class _BatchedQuerier:
+    """Coalesces concurrent similarity queries into batched vector DB calls"""
+    
+    def __init__(
+        self,
+        service: "VectorDatabaseService",
+        max_batch: int = 64,
+        max_wait: float = 0.008
+    ):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+    
+    async def submit(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Queue a query and wait for its matches from the next batch"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query_vector, top_k, namespace, filter, future))
+        return await future
+    
+    async def _collect(self) -> List[tuple]:
+        """Wait for one query, then gather more until the batch or window is full"""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _dispatch(self, items: List[tuple]) -> None:
+        """Issue one batched query for items sharing top_k, namespace and filter"""
+        _, top_k, namespace, filter, _ = items[0]
+        
+        try:
+            results = await self.service.query_similar_batch(
+                query_vectors=[item[0] for item in items],
+                top_k=top_k,
+                namespace=namespace,
+                filter=filter
+            )
+        except Exception as e:
+            for item in items:
+                if not item[4].done():
+                    item[4].set_exception(e)
+            return
+        
+        for item, matches in zip(items, results):
+            if not item[4].done():
+                item[4].set_result(matches)
+    
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            
+            # Only queries with identical parameters can share a request
+            groups: Dict[tuple, List[tuple]] = {}
+            for item in batch:
+                key = (item[1], item[2], json.dumps(item[3], sort_keys=True))
+                groups.setdefault(key, []).append(item)
+            
+            # Dispatch without awaiting so the next batch can form meanwhile
+            for items in groups.values():
+                task = asyncio.create_task(self._dispatch(items))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+    
+    async def close(self) -> None:
+        """Stop the batching task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
 
 class VectorDatabaseService:
     """Service for managing vector database operations"""
@@ -24,18 +323,63 @@ class VectorDatabaseService:
         self.dimensions = settings.VECTOR_DB_DIMENSIONS
         self.base_url = f"https://{self.index_name}-{self.environment}.svc.pinecone.io"
         
+        # One pooled HTTP/2 client multiplexes concurrent queries over a few
+        # connections; the transport retries failed connection attempts
         self.client = httpx.AsyncClient(
-            timeout=30.0,
+            timeout=httpx.Timeout(connect=2.0, read=5.0, write=5.0, pool=5.0),
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+                retries=2
+            ),
             headers={
                 "Api-Key": self.api_key,
                 "Content-Type": "application/json"
             }
         )
+        
+        self._batcher = _BatchedQuerier(
+            self,
+            max_batch=settings.VECTOR_DB_QUERY_BATCH_SIZE,
+            max_wait=settings.VECTOR_DB_QUERY_BATCH_WAIT_MS / 1000
+        )
+        
+        # Non-empty search results keyed by a bucketed hash of the query
+        # vector, so near-identical queries collapse onto one entry; cleared
+        # on every write
+        self._search_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+        self._search_generation = 0
+        
+        # Fingerprints are sharded into one namespace per language
+        self._namespaces: set = set()
+        self._namespaces_refreshed_at = 0.0
+        
+        # In-process ANN index replacing the remote service when selected
+        self._local_index: Optional[LocalHNSWIndex] = None
+        if settings.VECTOR_DB_PROVIDER == "hnswlib":
+            self._local_index = LocalHNSWIndex(
+                dimensions=self.dimensions,
+                path=settings.VECTOR_DB_INDEX_PATH,
+                max_elements=settings.VECTOR_DB_MAX_ELEMENTS,
+                save_every=settings.VECTOR_DB_SAVE_EVERY
+            )
     
     async def initialize(self) -> None:
         """Initialize vector database connection"""
         try:
+            if self._local_index is not None:
+                self._local_index.load()
+            
+            # Compile (or load the cached) vectorization kernel up front
+            self.fingerprint_to_vector(Fingerprint(
+                freq=np.zeros(1, dtype=np.float32),
+                time=np.zeros(1, dtype=np.float32),
+                mag=np.zeros(1, dtype=np.float32)
+            ))
+            
             stats = await self.get_index_stats()
+            self._namespaces.update(stats.get("namespaces", {}))
+            self._namespaces_refreshed_at = time.monotonic()
             logger.info(
                 f"Vector database initialized: {stats['total_vector_count']} vectors, "
                 f"{stats['dimension']} dimensions"
@@ -44,12 +388,40 @@ class VectorDatabaseService:
             logger.error(f"Failed to initialize vector database: {e}")
             raise VectorDatabaseError(f"Vector database initialization failed: {str(e)}")
     
+    async def _post_json(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST an orjson-encoded payload (NumPy arrays included) and decode the reply"""
+        response = await self.client.post(
+            f"{self.base_url}{path}",
+            content=orjson.dumps(payload or {}, option=orjson.OPT_SERIALIZE_NUMPY)
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content) if response.content else {}
+    
+    async def _search_namespaces(self) -> set:
+        """Known namespaces, re-read from index stats once they go stale"""
+        if time.monotonic() - self._namespaces_refreshed_at > NAMESPACE_REFRESH_SECONDS:
+            # Stamped first so concurrent searches do not all refresh at once
+            self._namespaces_refreshed_at = time.monotonic()
+            try:
+                stats = await self.get_index_stats()
+                self._namespaces.update(stats.get("namespaces", {}))
+            except VectorDatabaseError as e:
+                logger.warning(f"Failed to refresh vector namespaces: {e}")
+        
+        return self._namespaces | {DEFAULT_NAMESPACE}
+    
+    def _invalidate_search_cache(self) -> None:
+        """Drop cached search results, including those of queries still in flight"""
+        self._search_cache.clear()
+        self._search_generation += 1
+    
     async def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
+        if self._local_index is not None:
+            return self._local_index.stats()
+        
         try:
-            response = await self.client.post(f"{self.base_url}/describe_index_stats")
-            response.raise_for_status()
-            return response.json()
+            return await self._post_json("/describe_index_stats")
         except httpx.HTTPError as e:
             raise VectorDatabaseError(f"Failed to get index stats: {str(e)}")
     
@@ -59,20 +431,27 @@ class VectorDatabaseService:
         namespace: Optional[str] = None
     ) -> None:
         """Upsert vectors to the database"""
+        if namespace is not None:
+            self._namespaces.add(namespace)
+        
+        # New vectors can change any cached result, including past misses
+        self._invalidate_search_cache()
+        
+        if self._local_index is not None:
+            self._local_index.upsert(vectors, namespace=namespace)
+            logger.info(f"Successfully upserted {len(vectors)} vectors")
+            return
+        
         try:
             payload = {
                 "vectors": vectors,
                 "namespace": namespace
             }
             
-            response = await self.client.post(
-                f"{self.base_url}/vectors/upsert",
-                json=payload
-            )
-            response.raise_for_status()
+            await self._post_json("/vectors/upsert", payload)
             
             logger.info(f"Successfully upserted {len(vectors)} vectors")
-            
+        
         except httpx.HTTPError as e:
             raise VectorDatabaseError(f"Failed to upsert vectors: {str(e)}")
     
@@ -84,6 +463,9 @@ class VectorDatabaseService:
         filter: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Query similar vectors"""
+        if self._local_index is not None:
+            return self._local_index.query_batch([query_vector], top_k, namespace, filter)[0]
+        
         try:
             payload = {
                 "vector": query_vector,
@@ -93,18 +475,41 @@ class VectorDatabaseService:
                 "filter": filter
             }
             
-            response = await self.client.post(
-                f"{self.base_url}/query",
-                json=payload
-            )
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._post_json("/query", payload)
             matches = result.get("matches", [])
             
             logger.debug(f"Found {len(matches)} similar vectors")
             return matches
+        
+        except httpx.HTTPError as e:
+            raise VectorDatabaseError(f"Failed to query vectors: {str(e)}")
+    
+    async def query_similar_batch(
+        self,
+        query_vectors: List[List[float]],
+        top_k: int = 10,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Query similar vectors for several query vectors in one request"""
+        if self._local_index is not None:
+            return self._local_index.query_batch(query_vectors, top_k, namespace, filter)
+        
+        try:
+            payload = {
+                "queries": [{"values": vector} for vector in query_vectors],
+                "top_k": top_k,
+                "include_metadata": True,
+                "namespace": namespace,
+                "filter": filter
+            }
+            
+            result = await self._post_json("/query", payload)
+            matches = [query.get("matches", []) for query in result.get("results", [])]
             
+            logger.debug(f"Batched {len(query_vectors)} similarity queries")
+            return matches
+        
         except httpx.HTTPError as e:
             raise VectorDatabaseError(f"Failed to query vectors: {str(e)}")
     
@@ -114,92 +519,34 @@ class VectorDatabaseService:
         namespace: Optional[str] = None
     ) -> None:
         """Delete vectors by IDs"""
+        self._invalidate_search_cache()
+        
+        if self._local_index is not None:
+            self._local_index.delete(ids)
+            logger.info(f"Successfully deleted {len(ids)} vectors")
+            return
+        
         try:
             payload = {
                 "ids": ids,
                 "namespace": namespace
             }
             
-            response = await self.client.post(
-                f"{self.base_url}/vectors/delete",
-                json=payload
-            )
-            response.raise_for_status()
+            await self._post_json("/vectors/delete", payload)
             
             logger.info(f"Successfully deleted {len(ids)} vectors")
-            
+        
         except httpx.HTTPError as e:
             raise VectorDatabaseError(f"Failed to delete vectors: {str(e)}")
     
-    def fingerprint_to_vector(self, fingerprint_data: Dict[str, Any]) -> List[float]:
-        """Convert fingerprint to vector representation"""
-        vector = []
-        
-        # Extract peaks from fingerprint
-        peaks = fingerprint_data.get("peaks", [])
-        
-        if peaks:
-            # Frequency distribution (20 bins)
-            freq_bins = 20
-            freq_histogram = [0.0] * freq_bins
-            
-            for peak in peaks:
-                frequency = peak.get("frequency", 0.0)
-                magnitude = peak.get("magnitude", 0.0)
-                
-                bin_idx = min(int((frequency / 20000.0) * freq_bins), freq_bins - 1)
-                freq_histogram[bin_idx] += magnitude
-            
-            # Normalize frequency histogram
-            max_freq = max(freq_histogram) if freq_histogram else 1.0
-            if max_freq > 0:
-                freq_histogram = [val / max_freq for val in freq_histogram]
-            
-            vector.extend(freq_histogram)
-        
-        # Time distribution (10 bins)
-        time_bins = 10
-        time_histogram = [0.0] * time_bins
-        
-        metadata = fingerprint_data.get("metadata", {})
-        duration = metadata.get("duration", 1.0)
-        
-        for peak in peaks:
-            time = peak.get("time", 0.0)
-            magnitude = peak.get("magnitude", 0.0)
-            
-            bin_idx = min(int((time / duration) * time_bins), time_bins - 1)
-            time_histogram[bin_idx] += magnitude
-        
-        # Normalize time histogram
-        max_time = max(time_histogram) if time_histogram else 1.0
-        if max_time > 0:
-            time_histogram = [val / max_time for val in time_histogram]
-        
-        vector.extend(time_histogram)
-        
-        # Statistical features
-        if peaks:
-            magnitudes = [peak.get("magnitude", 0.0) for peak in peaks]
-            mean_magnitude = sum(magnitudes) / len(magnitudes)
-            max_magnitude = max(magnitudes)
-            min_magnitude = min(magnitudes)
-            
-            vector.extend([mean_magnitude, max_magnitude, min_magnitude])
-        
-        # Pad or truncate to target dimensions
-        while len(vector) < self.dimensions:
-            vector.append(0.0)
-        
-        if len(vector) > self.dimensions:
-            vector = vector[:self.dimensions]
-        
-        return vector
+    def fingerprint_to_vector(self, fingerprint_data: FingerprintInput) -> np.ndarray:
+        """Convert fingerprint to a float32 vector representation"""
+        return compute_fingerprint_vector(as_fingerprint(fingerprint_data), self.dimensions)
     
     async def add_fingerprint(
         self,
         song_id: UUID,
-        fingerprint_data: Dict[str, Any],
+        fingerprint_data: FingerprintInput,
         metadata: Dict[str, Any]
     ) -> None:
         """Add audio fingerprint to vector database"""
@@ -207,30 +554,29 @@ class VectorDatabaseService:
             # Convert fingerprint to vector
             vector = self.fingerprint_to_vector(fingerprint_data)
             
-            # Prepare metadata
-            full_metadata = metadata.copy()
-            full_metadata["song_id"] = str(song_id)
-            full_metadata["fingerprint_id"] = str(UUID.uuid4())
-            full_metadata["created_at"] = asyncio.get_event_loop().time()
-            
             # Prepare vector data
             vector_data = {
                 "id": f"fingerprint_{song_id}",
                 "values": vector,
-                "metadata": full_metadata
+                "metadata": {
+                    **metadata,
+                    "song_id": str(song_id),
+                    "fingerprint_id": uuid.uuid4().hex,
+                    "created_at": time.time()
+                }
             }
             
-            # Upsert to vector database
-            await self.upsert_vectors([vector_data])
+            # Upsert into the song's language namespace
+            await self.upsert_vectors([vector_data], namespace=metadata.get("language", "en"))
             
             logger.info(f"Added fingerprint for song {song_id} to vector database")
-            
+        
         except Exception as e:
             raise VectorDatabaseError(f"Failed to add fingerprint: {str(e)}")
     
     async def search_similar_fingerprints(
         self,
-        fingerprint_data: Dict[str, Any],
+        fingerprint_data: FingerprintInput,
         top_k: int = 10,
         language_filter: Optional[str] = None,
         genre_filter: Optional[str] = None
@@ -238,26 +584,58 @@ class VectorDatabaseService:
         """Search for similar fingerprints"""
         try:
             # Convert fingerprint to vector
-            query_vector = self.fingerprint_to_vector(fingerprint_data)
+            vector = self.fingerprint_to_vector(fingerprint_data)
             
-            # Build filter if needed
-            filter_dict = {}
-            if language_filter:
-                filter_dict["language"] = language_filter
-            if genre_filter:
-                filter_dict["genre"] = genre_filter
+            # "auto" and empty hints search every language
+            language = None if language_filter in ANY_LANGUAGE else language_filter
             
-            filter_option = filter_dict if filter_dict else None
+            cache_key = _search_cache_key(vector, top_k, language, genre_filter)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self._search_generation
             
-            # Query similar vectors
-            matches = await self.query_similar(
-                query_vector=query_vector,
-                top_k=top_k,
-                filter=filter_option
-            )
+            # Language selects the namespace; only genre needs a filter there.
+            # Unsharded fingerprints in the default namespace are always
+            # searched too, filtered by language when there is a hint
+            genre_option = {"genre": genre_filter} if genre_filter else {}
+            if language:
+                queries = [
+                    (language, genre_option or None),
+                    (DEFAULT_NAMESPACE, {**genre_option, "language": language})
+                ]
+            else:
+                queries = [(namespace, genre_option or None) for namespace in await self._search_namespaces()]
             
-            return matches
+            # Query similar vectors and merge; remote queries are batched
+            # with concurrent searches, in-process ones have no round trip
+            # worth amortising and run directly
+            if self._local_index is not None:
+                per_namespace = [
+                    self._local_index.query_batch([vector], top_k, namespace, filter_option)[0]
+                    for namespace, filter_option in queries
+                ]
+            else:
+                per_namespace = await asyncio.gather(*[
+                    self._batcher.submit(
+                        query_vector=vector,
+                        top_k=top_k,
+                        namespace=namespace,
+                        filter=filter_option
+                    )
+                    for namespace, filter_option in queries
+                ])
+            matches = sorted(
+                (match for namespace_matches in per_namespace for match in namespace_matches),
+                key=lambda match: match.get("score", 0.0),
+                reverse=True
+            )[:top_k]
             
+            # Misses are not cached so newly added songs match right away
+            if matches and generation == self._search_generation:
+                self._search_cache[cache_key] = matches
+            return matches
+        
         except Exception as e:
             raise VectorDatabaseError(f"Failed to search similar fingerprints: {str(e)}")
     
@@ -268,31 +646,37 @@ class VectorDatabaseService:
         """Batch upsert fingerprints"""
         try:
             batch_size = 100  # Pinecone batch limit
+            now = time.time()
             
             for i in range(0, len(fingerprints), batch_size):
                 batch = fingerprints[i:i + batch_size]
                 
-                vector_data_list = []
-                for song_id, fingerprint_data, metadata in batch:
-                    vector = self.fingerprint_to_vector(fingerprint_data)
-                    
-                    full_metadata = metadata.copy()
-                    full_metadata["song_id"] = str(song_id)
-                    full_metadata["fingerprint_id"] = str(UUID.uuid4())
-                    full_metadata["created_at"] = asyncio.get_event_loop().time()
-                    
+                vectors = [self.fingerprint_to_vector(fingerprint_data) for _, fingerprint_data, _ in batch]
+                
+                vectors_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+                for (song_id, fingerprint_data, metadata), vector in zip(batch, vectors):
                     vector_data = {
                         "id": f"fingerprint_{song_id}",
                         "values": vector,
-                        "metadata": full_metadata
+                        "metadata": {
+                            **metadata,
+                            "song_id": str(song_id),
+                            "fingerprint_id": uuid.uuid4().hex,
+                            "created_at": now
+                        }
                     }
                     
-                    vector_data_list.append(vector_data)
-                
-                await self.upsert_vectors(vector_data_list)
+                    namespace = metadata.get("language", "en")
+                    vectors_by_namespace.setdefault(namespace, []).append(vector_data)
                 
-            logger.info(f"Successfully batch upserted {len(fingerprints)} fingerprints")
+                # Upsert each language namespace separately
+                await asyncio.gather(*[
+                    self.upsert_vectors(vector_data_list, namespace=namespace)
+                    for namespace, vector_data_list in vectors_by_namespace.items()
+                ])
             
+            logger.info(f"Successfully batch upserted {len(fingerprints)} fingerprints")
+        
         except Exception as e:
             raise VectorDatabaseError(f"Failed to batch upsert fingerprints: {str(e)}")
     
@@ -305,21 +689,31 @@ class VectorDatabaseService:
             return False
     
     async def close(self) -> None:
-        """Close the HTTP client"""
+        """Close the query batcher and HTTP client, persisting any local index"""
+        await self._batcher.close()
+        if self._local_index is not None:
+            self._local_index.save()
         await self.client.aclose()
 
 
 # Global vector database service instance
 _vector_service: Optional[VectorDatabaseService] = None
+_vector_service_lock = asyncio.Lock()
 
 
 async def get_vector_service() -> VectorDatabaseService:
     """Get or create vector database service instance"""
     global _vector_service
     
-    if _vector_service is None:
-        _vector_service = VectorDatabaseService()
-        await _vector_service.initialize()
+    if _vector_service is not None:
+        return _vector_service
+    
+    # Published only once initialized, so no caller sees a half-built service
+    async with _vector_service_lock:
+        if _vector_service is None:
+            service = VectorDatabaseService()
+            await service.initialize()
+            _vector_service = service
     
     return _vector_service
 
@@ -0,0 +1,149 @@
+"""
+Lightweight container header probing for early audio rejection
+"""
+
+import struct
+from typing import Optional
+
+# Enough bytes to cover RIFF/fmt, FLAC STREAMINFO and an MP3 frame with
+# its Xing/VBRI header after a typical ID3v2 tag
+HEADER_PROBE_SIZE = 16 * 1024
+
+# MPEG audio lookup tables indexed by header fields
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+_MPEG1_L3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MPEG2_L3_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+
+# Placeholder data sizes written by streaming WAV encoders that never
+# seek back to patch the header
+_WAV_UNKNOWN_SIZES = (0, 0xFFFFFFFF)
+
+
+def _probe_wav(header: bytes, total_size: Optional[int]) -> Optional[float]:
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    
+    byte_rate = None
+    offset = 12
+    
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", header, offset + 4)[0]
+        body = offset + 8
+        
+        if chunk_id == b"fmt " and body + 12 <= len(header):
+            byte_rate = struct.unpack_from("<I", header, body + 8)[0]
+        elif chunk_id == b"data":
+            if not byte_rate or chunk_size in _WAV_UNKNOWN_SIZES:
+                return None
+            # A truncated upload holds less audio than the header claims
+            if total_size is not None:
+                chunk_size = min(chunk_size, max(total_size - body, 0))
+            return chunk_size / byte_rate
+        
+        # Chunks are word aligned
+        offset = body + chunk_size + (chunk_size & 1)
+    
+    return None
+
+
+def _probe_flac(header: bytes) -> Optional[float]:
+    # STREAMINFO is always the first metadata block
+    if len(header) < 8 + 34 or header[:4] != b"fLaC" or header[4] & 0x7F != 0:
+        return None
+    
+    # 20 bits sample rate, 3 bits channels, 5 bits bps, 36 bits total samples
+    packed = int.from_bytes(header[18:26], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & ((1 << 36) - 1)
+    
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _probe_mp3(header: bytes, total_size: Optional[int]) -> Optional[float]:
+    offset = 0
+    
+    # Skip an ID3v2 tag; its size is a 28-bit syncsafe integer
+    if header[:3] == b"ID3" and len(header) >= 10:
+        tag_size = (
+            (header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 |
+            (header[8] & 0x7F) << 7 | (header[9] & 0x7F)
+        )
+        offset = 10 + tag_size
+    
+    if offset + 4 > len(header):
+        return None
+    
+    frame = struct.unpack_from(">I", header, offset)[0]
+    if frame >> 21 != 0x7FF:
+        return None
+    
+    version = (frame >> 19) & 0x3
+    layer = (frame >> 17) & 0x3
+    bitrate_index = (frame >> 12) & 0xF
+    sample_rate_index = (frame >> 10) & 0x3
+    mono = (frame >> 6) & 0x3 == 3
+    
+    # Only MPEG Layer III is probed
+    if version not in _MPEG_SAMPLE_RATES or layer != 1 or sample_rate_index == 3:
+        return None
+    if bitrate_index in (0, 15):
+        return None
+    
+    sample_rate = _MPEG_SAMPLE_RATES[version][sample_rate_index]
+    mpeg1 = version == 3
+    samples_per_frame = 1152 if mpeg1 else 576
+    
+    # Xing/Info header follows the side information of the first frame
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if header[xing:xing + 4] in (b"Xing", b"Info") and xing + 12 <= len(header):
+        flags = struct.unpack_from(">I", header, xing + 4)[0]
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", header, xing + 8)[0]
+            return frames * samples_per_frame / sample_rate
+    
+    # VBRI header sits at a fixed offset after the frame header
+    vbri = offset + 4 + 32
+    if header[vbri:vbri + 4] == b"VBRI" and vbri + 18 <= len(header):
+        frames = struct.unpack_from(">I", header, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate
+    
+    # Without a VBR header assume constant bitrate over the remaining bytes
+    if total_size is None:
+        return None
+    bitrates = _MPEG1_L3_BITRATES if mpeg1 else _MPEG2_L3_BITRATES
+    return (total_size - offset) * 8 / (bitrates[bitrate_index] * 1000)
+
+
+def probe_duration_from_header(
+    header: bytes,
+    content_type: Optional[str],
+    total_size: Optional[int] = None
+) -> Optional[float]:
+    """
+    Estimate audio duration from container headers alone
+    
+    Args:
+        header: Leading bytes of the file, HEADER_PROBE_SIZE is enough
+        content_type: MIME type of the upload
+        total_size: Full file size, used for constant bitrate MP3 estimates
+            and to cap WAV data chunks to the bytes actually uploaded
+    
+    Returns:
+        Duration in seconds, or None if the header does not determine it
+    """
+    if content_type in ("audio/wav", "audio/x-wav"):
+        return _probe_wav(header, total_size)
+    if content_type in ("audio/flac", "audio/x-flac"):
+        return _probe_flac(header)
+    if content_type == "audio/mpeg":
+        return _probe_mp3(header, total_size)
+    return None
@@ -0,0 +1,38 @@
+"""
+Keyset pagination helpers for recognition history
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from fastapi import HTTPException
+
+# Upper bound on rows returned per history page
+MAX_HISTORY_LIMIT = 200
+
+
+def clamp_history_limit(limit: int) -> int:
+    """Clamp a requested page size into 1..MAX_HISTORY_LIMIT"""
+    return min(max(1, limit), MAX_HISTORY_LIMIT)
+
+
+def encode_history_cursor(recognition: Dict[str, Any]) -> str:
+    """Encode the (created_at, id) keyset position of a history row"""
+    created_at = recognition["created_at"]
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    
+    raw = f"{created_at}|{recognition['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a history cursor back into its (created_at, id) keyset position"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, recognition_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), recognition_id
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
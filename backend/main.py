@@ -4,13 +4,16 @@ Sonica Backend API - Ultra-fast music recognition service
 
 import asyncio
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.formparsers import MultiPartParser
+from brotli_asgi import BrotliMiddleware
 import uvicorn
 
 from app.core.config import settings
@@ -18,8 +21,12 @@ from app.core.database import init_db
 from app.core.redis import init_redis
 from app.api.v1.api import api_router
 from app.core.exceptions import SonicaException
+from app.core.responses import ORJSONResponse, build_error_body, prebuilt_error_response
 from app.core.middleware import add_middleware
 from app.core.logging import setup_logging
+from app.services.recognition_logger import find_batch_logger, start_batch_logger, stop_batch_logger
+from app.api.v1.endpoints.recognition import get_recognition_cache_stats
+from app.services.vector_service import close_vector_service
 
 # Setup logging
 setup_logging()
@@ -39,6 +46,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await init_redis()
     logger.info("Redis initialized")
     
+    # Start batched recognition logging
+    await start_batch_logger()
+    logger.info("Recognition batch logger started")
+    
     # Initialize audio engine
     # This would typically initialize the Rust audio engine
     logger.info("Audio engine initialized")
@@ -46,6 +57,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield
     
     logger.info("Shutting down Sonica API server...")
+    
+    # Flush queued recognition logs before exit
+    await stop_batch_logger()
+    
+    # Persists the local HNSW index when that backend is in use
+    await close_vector_service()
 
 
 # Create FastAPI application
@@ -56,13 +73,107 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add middleware
 add_middleware(app)
 
+# Brotli at a low quality costs less CPU than gzip for similar ratios on
+# small JSON bodies; payloads under 1KB such as /health go uncompressed
+app.add_middleware(BrotliMiddleware, minimum_size=1024, quality=4)
+
+# Keep uploads up to MAX_AUDIO_SIZE spooled in memory so they never roll to disk
+MultiPartParser.max_file_size = settings.MAX_AUDIO_SIZE + 1
+
+def log_recognition_error(request: Request, exc: Exception) -> None:
+    """Queue a failed recognition request for the batched error log"""
+    if request.url.path not in RECOGNITION_PATHS:
+        return
+    
+    start_ns = getattr(request.state, "start_ns", None)
+    processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000 if start_ns else 0
+    request_id = getattr(request.state, "request_id", None)
+    # str() of an HTTPException is empty; its message is in detail
+    error = str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+    
+    # Before startup or without a lifespan there is no queue to write to
+    batch_logger = find_batch_logger()
+    if batch_logger is None:
+        logger.warning(f"Recognition request {request_id} failed after {processing_time_ms}ms: {error}")
+        return
+    
+    batch_logger.enqueue_error(
+        error=error,
+        processing_time_ms=processing_time_ms,
+        request_id=request_id
+    )
+
+
+# Allowance for multipart boundaries and form fields around the audio file
+MULTIPART_OVERHEAD = 64 * 1024
+
+_OVERSIZE_MESSAGE = f"Request body too large. Maximum size: {settings.MAX_AUDIO_SIZE / (1024*1024):.1f}MB"
+_OVERSIZE_BODY = build_error_body("HTTP_ERROR", _OVERSIZE_MESSAGE, 413)
+
+
 # Include API routes
-app.include_router(api_router, prefix="/api/v1")
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+# Recognition POST endpoints, whose failures are written to the recognition error log
+RECOGNITION_PATHS = frozenset(
+    route.path
+    for route in app.routes
+    if isinstance(route, APIRoute) and "recognition" in route.tags and "POST" in route.methods
+)
+
+
+class RequestContextMiddleware:
+    """
+    Stamp each request with an ID and start time, and reject oversize uploads
+    
+    Plain ASGI rather than BaseHTTPMiddleware, so requests pass through
+    without an extra task and body stream per layer. Only the file upload
+    route is size-checked; the streaming endpoint takes larger bodies.
+    """
+    
+    def __init__(self, app, upload_path: str, max_body_size: int):
+        self.app = app
+        self.upload_path = upload_path
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        state = scope.setdefault("state", {})
+        state["request_id"] = os.urandom(16).hex()
+        state["start_ns"] = time.perf_counter_ns()
+        
+        if scope["path"] == self.upload_path:
+            for name, value in scope["headers"]:
+                if name != b"content-length":
+                    continue
+                if value.isdigit() and int(value) > self.max_body_size:
+                    # Skips the exception handlers, so account for the rejection here
+                    request = Request(scope)
+                    logger.info(f"Rejected {value.decode()} byte body for {request.url.path}")
+                    log_recognition_error(request, HTTPException(status_code=413, detail=_OVERSIZE_MESSAGE))
+                    await prebuilt_error_response(_OVERSIZE_BODY, 413)(scope, receive, send)
+                    return
+                break
+        
+        await self.app(scope, receive, send)
+
+
+# Added last so it runs first and every response, rejections included,
+# carries a request ID
+app.add_middleware(
+    RequestContextMiddleware,
+    upload_path=app.url_path_for("recognize_music"),
+    max_body_size=settings.MAX_AUDIO_SIZE + MULTIPART_OVERHEAD
+)
 
 
 @app.get("/")
@@ -82,14 +193,16 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": "2025-01-06T10:30:00Z",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "recognition_cache": get_recognition_cache_stats()
     }
 
 
 @app.exception_handler(SonicaException)
 async def sonica_exception_handler(request, exc: SonicaException):
     """Handle custom Sonica exceptions"""
-    return JSONResponse(
+    log_recognition_error(request, exc)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -107,7 +220,8 @@ async def sonica_exception_handler(request, exc: SonicaException):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc: HTTPException):
     """Handle HTTP exceptions"""
-    return JSONResponse(
+    log_recognition_error(request, exc)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -126,7 +240,8 @@ async def http_exception_handler(request, exc: HTTPException):
 async def general_exception_handler(request, exc: Exception):
     """Handle general exceptions"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    log_recognition_error(request, exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -141,11 +256,18 @@ async def general_exception_handler(request, exc: Exception):
 
 
 if __name__ == "__main__":
+    # Caches and a local HNSW index live in process memory, so the hnswlib
+    # backend runs a single worker; reload mode only supports one as well
+    single_worker = settings.DEBUG or settings.VECTOR_DB_PROVIDER == "hnswlib"
+    
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        workers=1 if single_worker else os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
         log_level="info" if not settings.DEBUG else "debug",
-        access_log=True,
+        access_log=False,
     )
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for the Sonica backend
+"""
+
+import os
+import sys
+
+# Tests import the app package from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,82 @@
+"""
+Tests for container header duration probing
+"""
+
+import struct
+
+import pytest
+
+from app.utils.audio_header import probe_duration_from_header
+
+
+def wav_header(byte_rate: int = 176400, data_size: int = 176400 * 5) -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, 2, 44100, byte_rate, 4, 16)
+    return (
+        b"RIFF" + struct.pack("<I", min(36 + data_size, 0xFFFFFFFF)) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def flac_header(sample_rate: int = 48000, total_samples: int = 48000 * 7) -> bytes:
+    packed = sample_rate << 44 | 1 << 41 | 15 << 36 | total_samples
+    streaminfo = bytes(10) + packed.to_bytes(8, "big") + bytes(16)
+    return b"fLaC" + b"\x80" + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+
+# MPEG-1 Layer III, 128kbps, 44.1kHz, joint stereo
+MP3_FRAME = bytes.fromhex("fffb9064")
+
+
+def xing_frame(frames: int) -> bytes:
+    return MP3_FRAME + bytes(32) + b"Xing" + struct.pack(">II", 0x1, frames)
+
+
+def id3_tag(size: int) -> bytes:
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x04\x00\x00" + syncsafe
+
+
+@pytest.mark.parametrize(
+    "header, content_type, total_size, expected",
+    [
+        # WAV
+        (wav_header(), "audio/wav", None, 5.0),
+        (wav_header(), "audio/x-wav", None, 5.0),
+        (wav_header(), "audio/wav", 44 + 176400 * 5, 5.0),
+        (wav_header(), "audio/wav", 44 + 176400 * 2, 2.0),
+        (wav_header(data_size=0), "audio/wav", 44 + 176400 * 5, None),
+        (wav_header(data_size=0xFFFFFFFF), "audio/wav", None, None),
+        (wav_header(data_size=0xFFFFFFFF), "audio/wav", 44 + 176400 * 5, None),
+        (wav_header(byte_rate=0), "audio/wav", None, None),
+        (wav_header()[:11], "audio/wav", None, None),
+        (wav_header()[:40], "audio/wav", None, None),
+        (b"RIFX" + wav_header()[4:], "audio/wav", None, None),
+        # FLAC
+        (flac_header(), "audio/flac", None, 7.0),
+        (flac_header(), "audio/x-flac", None, 7.0),
+        (flac_header(total_samples=0), "audio/flac", None, None),
+        (flac_header()[:41], "audio/flac", None, None),
+        (b"fLaC\x84" + flac_header()[5:], "audio/flac", None, None),
+        # MP3
+        (xing_frame(100), "audio/mpeg", None, 100 * 1152 / 44100),
+        (id3_tag(10) + bytes(10) + xing_frame(100), "audio/mpeg", None, 100 * 1152 / 44100),
+        (MP3_FRAME + bytes(64), "audio/mpeg", 160000, 10.0),
+        (MP3_FRAME + bytes(64), "audio/mpeg", None, None),
+        (MP3_FRAME[:3], "audio/mpeg", 160000, None),
+        (id3_tag(4096) + bytes(100), "audio/mpeg", 160000, None),
+        (id3_tag(10)[:8], "audio/mpeg", 160000, None),
+        (bytes(64), "audio/mpeg", 160000, None),
+        # Formats without a probe
+        (b"OggS" + bytes(60), "audio/ogg", None, None),
+        (wav_header(), None, None, None),
+        (b"", "audio/wav", None, None),
+    ],
+)
+def test_probe_duration_from_header(header, content_type, total_size, expected):
+    duration = probe_duration_from_header(header, content_type, total_size)
+    
+    if expected is None:
+        assert duration is None
+    else:
+        assert duration == pytest.approx(expected)
@@ -0,0 +1,166 @@
+"""
+Tests for the in-process HNSW vector index
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from app.services.hnsw_index import LocalHNSWIndex
+
+DIMENSIONS = 16
+
+
+def make_vectors(prefix: str, count: int, rng: np.random.Generator, **metadata) -> list:
+    return [
+        {"id": f"{prefix}{i}", "values": rng.random(DIMENSIONS), "metadata": dict(metadata)}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def index(tmp_path) -> LocalHNSWIndex:
+    return LocalHNSWIndex(DIMENSIONS, str(tmp_path / "index.hnsw"), max_elements=64, save_every=0)
+
+
+def ids(matches: list) -> set:
+    return {match["id"] for match in matches}
+
+
+def test_small_namespace_gets_full_top_k(index, rng):
+    index.upsert(make_vectors("en", 500, rng), namespace="en")
+    index.upsert(make_vectors("hi", 5, rng), namespace="hi")
+    
+    [matches] = index.query_batch([rng.random(DIMENSIONS)], top_k=10, namespace="hi")
+    
+    assert ids(matches) == {f"hi{i}" for i in range(5)}
+
+
+@pytest.mark.parametrize("namespace", [None, "", "xx"])
+def test_unknown_or_default_namespace_is_empty(index, rng, namespace):
+    index.upsert(make_vectors("en", 20, rng), namespace="en")
+    
+    assert index.query_batch([rng.random(DIMENSIONS)], top_k=5, namespace=namespace) == [[]]
+
+
+def test_upsert_moves_vector_between_namespaces(index, rng):
+    index.upsert(make_vectors("a", 3, rng), namespace="en")
+    moved = make_vectors("a", 1, rng, language="hi")
+    index.upsert(moved, namespace="hi")
+    
+    query = [moved[0]["values"]]
+    assert "a0" not in ids(index.query_batch(query, top_k=10, namespace="en")[0])
+    assert ids(index.query_batch(query, top_k=10, namespace="hi")[0]) == {"a0"}
+    assert index.stats()["namespaces"] == {"en": {"vector_count": 2}, "hi": {"vector_count": 1}}
+    
+    # Moving back revives the label in its old graph
+    index.upsert(make_vectors("a", 1, rng), namespace="en")
+    assert index.stats()["namespaces"] == {"en": {"vector_count": 3}}
+
+
+def test_delete_removes_vector(index, rng):
+    index.upsert(make_vectors("en", 10, rng), namespace="en")
+    index.delete(["en3", "missing"])
+    
+    [matches] = index.query_batch([rng.random(DIMENSIONS)], top_k=20, namespace="en")
+    
+    assert len(matches) == 9
+    assert "en3" not in ids(matches)
+
+
+def test_metadata_filter_counts_only_allowed_vectors(index, rng):
+    index.upsert(make_vectors("pop", 300, rng, genre="pop"), namespace="en")
+    index.upsert(make_vectors("rock", 3, rng, genre="rock"), namespace="en")
+    
+    [matches] = index.query_batch([rng.random(DIMENSIONS)], top_k=10, namespace="en", filter={"genre": "rock"})
+    
+    assert ids(matches) == {"rock0", "rock1", "rock2"}
+
+
+class _ShortGraph:
+    """Wraps an hnswlib index whose graph walk always comes up short"""
+    
+    def __init__(self, index):
+        self.index = index
+    
+    def knn_query(self, *args, **kwargs):
+        raise RuntimeError("Cannot return the results in a contigious 2D array")
+    
+    def get_items(self, labels):
+        return self.index.get_items(labels)
+
+
+def test_exact_search_fallback_matches_graph_search(index, rng):
+    index.upsert(make_vectors("en", 50, rng, genre="pop"), namespace="en")
+    queries = [rng.random(DIMENSIONS) for _ in range(3)]
+    expected = index.query_batch(queries, top_k=5, namespace="en", filter={"genre": "pop"})
+    
+    index.indexes["en"] = _ShortGraph(index.indexes["en"])
+    fallback = index.query_batch(queries, top_k=5, namespace="en", filter={"genre": "pop"})
+    
+    assert [[m["id"] for m in row] for row in fallback] == [[m["id"] for m in row] for row in expected]
+    for exact_row, graph_row in zip(fallback, expected):
+        for exact, graph in zip(exact_row, graph_row):
+            assert exact["score"] == pytest.approx(graph["score"], abs=1e-5)
+
+
+def test_save_and_load_round_trip(index, rng, tmp_path):
+    index.upsert(make_vectors("en", 20, rng), namespace="en")
+    index.upsert(make_vectors("hi", 5, rng), namespace="hi")
+    index.delete(["en0"])
+    index.save()
+    
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    
+    loaded = LocalHNSWIndex(DIMENSIONS, index.path, max_elements=64)
+    loaded.load()
+    
+    assert loaded.stats() == index.stats()
+    query = [rng.random(DIMENSIONS)]
+    assert loaded.query_batch(query, top_k=5, namespace="hi") == index.query_batch(query, top_k=5, namespace="hi")
+
+
+def test_saves_after_enough_writes(tmp_path, rng):
+    index = LocalHNSWIndex(DIMENSIONS, str(tmp_path / "index.hnsw"), max_elements=64, save_every=10)
+    
+    index.upsert(make_vectors("en", 9, rng), namespace="en")
+    assert not os.path.exists(index._metadata_path)
+    
+    index.upsert(make_vectors("hi", 1, rng), namespace="hi")
+    assert os.path.exists(index._metadata_path)
+
+
+def test_failed_save_keeps_previous_files(index, rng, monkeypatch):
+    index.upsert(make_vectors("en", 5, rng), namespace="en")
+    index.save()
+    
+    with open(index._metadata_path, "rb") as f:
+        saved = f.read()
+    
+    index.upsert(make_vectors("more", 5, rng), namespace="en")
+    def disk_full(*args, **kwargs):
+        raise OSError("disk full")
+    
+    monkeypatch.setattr("app.services.hnsw_index.json.dump", disk_full)
+    with pytest.raises(OSError):
+        index.save()
+    
+    with open(index._metadata_path, "rb") as f:
+        assert f.read() == saved
+
+
+def test_load_without_metadata_starts_empty(index, rng):
+    index.upsert(make_vectors("en", 5, rng), namespace="en")
+    index.save()
+    os.remove(index._metadata_path)
+    
+    loaded = LocalHNSWIndex(DIMENSIONS, index.path, max_elements=64)
+    loaded.load()
+    
+    assert loaded.stats()["total_vector_count"] == 0
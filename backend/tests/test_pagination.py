@@ -0,0 +1,73 @@
+"""
+Tests for recognition history keyset pagination helpers
+"""
+
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import (
+    MAX_HISTORY_LIMIT,
+    clamp_history_limit,
+    decode_history_cursor,
+    encode_history_cursor,
+)
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime(2025, 1, 6, 10, 30, tzinfo=timezone.utc),
+        datetime(2025, 1, 6, 10, 30, 0, 123456),
+        "2025-01-06T10:30:00+00:00",
+    ],
+)
+def test_cursor_round_trip(created_at):
+    cursor = encode_history_cursor({"created_at": created_at, "id": "rec|42"})
+    
+    decoded_at, recognition_id = decode_history_cursor(cursor)
+    
+    expected = created_at if isinstance(created_at, datetime) else datetime.fromisoformat(created_at)
+    assert decoded_at == expected
+    assert recognition_id == "rec|42"
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "abc",
+        "é",
+        _b64(b"2025-01-06T10:30:00"),
+        _b64(b"yesterday|rec-1"),
+        _b64(b"\xff\xfe|rec-1"),
+        "",
+    ],
+)
+def test_malformed_cursor_is_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_history_cursor(cursor)
+    
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [
+        (-5, 1),
+        (0, 1),
+        (1, 1),
+        (50, 50),
+        (MAX_HISTORY_LIMIT, MAX_HISTORY_LIMIT),
+        (MAX_HISTORY_LIMIT + 1, MAX_HISTORY_LIMIT),
+        (10_000, MAX_HISTORY_LIMIT),
+    ],
+)
+def test_history_limit_is_clamped(limit, expected):
+    assert clamp_history_limit(limit) == expected
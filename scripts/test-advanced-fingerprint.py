@@ -4,41 +4,159 @@ Advanced Fingerprint Testing Script using Gemini CLI
 Tests and optimizes the advanced fingerprinting algorithms for Hindi/Bhojpuri music
 """
 
+import os
+import selectors
 import subprocess
 import json
 import time
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache, partial
+from multiprocessing import shared_memory
 import numpy as np
-import matplotlib.pyplot as plt
-from pathlib import Path
-import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import scipy.fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Sample dtype for all signal math; fingerprinting doesn't need float64
+# precision, and float32 halves memory traffic and doubles SIMD width
+DTYPE = np.float32
+
+# Spectral analysis frame layout used by the benchmark
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+HANN_WINDOW = np.hanning(FRAME_SIZE).astype(DTYPE)
+
+# Timed runs per benchmark; the median and MAD of the runs are reported
+BENCHMARK_REPEATS = 7
+
+# Synthetic test signal layout; the time base and fixed tones never change,
+# so they are computed once at import and shared read-only
+SAMPLE_RATE = 44100
+DURATION = 5.0  # seconds
+_T = np.linspace(0, DURATION, int(SAMPLE_RATE * DURATION), dtype=DTYPE)
+_TWO_PI_T = DTYPE(2 * np.pi) * _T
+_SIN_440 = np.sin(_TWO_PI_T * DTYPE(440))
+_SIN_554 = np.sin(_TWO_PI_T * DTYPE(554.37))
+_SIN_659 = np.sin(_TWO_PI_T * DTYPE(659.25))
+for _array in (_T, _TWO_PI_T, _SIN_440, _SIN_554, _SIN_659):
+    _array.flags.writeable = False
+del _array
+
+# Signals stored in the legacy test_audio_data.json format
+LEGACY_SIGNAL_NAMES = ("test1_pure_tone", "test2_chord", "test3_chirp", "test4_noisy")
+
+# Generated test data is saved as one uncompressed .npy per array, so the
+# signals can be memory-mapped instead of read into the heap
+TEST_DATA_DIR = "test_audio_data"
+TEST_DATA_NAMES = LEGACY_SIGNAL_NAMES + ("sample_rate", "duration")
+
+# Seconds a Gemini call may go without producing output before it is killed
+GEMINI_IDLE_TIMEOUT = 30
+
+# Gemini output kept per call: max_tokens at a generous UTF-8 bytes-per-token
+# bound, plus a small cap on stderr
+GEMINI_MAX_BYTES_PER_TOKEN = 6
+GEMINI_STDERR_CAP = 64 * 1024
+
+# Fixed seed for the synthetic noise in generated test data
+TEST_DATA_SEED = 0
+
+def write_json(path, data):
+    """Write indented JSON, natively serializing NumPy values when orjson is installed"""
+    if orjson is None:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return
+    
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+
+def read_json(path):
+    """Read a JSON file written by write_json"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read()) if orjson is not None else json.load(f)
+
+@lru_cache(maxsize=None)
+def gemini_version():
+    """Installed Gemini CLI version, or None if unavailable; checked once per run"""
+    try:
+        result = subprocess.run(["gemini", "--version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
 
 def run_gemini_command(prompt, max_tokens=4000):
-    """Run a command using Gemini CLI"""
+    """Run a command using Gemini CLI, streaming its output until it exits or stalls"""
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             ["gemini", "chat", prompt],
-            capture_output=True,
-            text=True,
-            timeout=30
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
         )
-        if result.returncode == 0:
-            return result.stdout.strip()
-        else:
-            print(f"Error running Gemini: {result.stderr}")
-            return None
-    except subprocess.TimeoutExpired:
-        print("Gemini command timed out")
-        return None
     except Exception as e:
         print(f"Error running Gemini: {e}")
         return None
-
-def test_fingerprint_algorithm():
-    """Test the advanced fingerprinting algorithm"""
-    print("🧪 Testing Advanced Fingerprint Algorithm...")
     
-    # Test prompt for Gemini
-    prompt = """
+    output = {process.stdout: [], process.stderr: []}
+    
+    # Bytes still kept per stream; anything past the cap is read and dropped
+    remaining = {
+        process.stdout: max_tokens * GEMINI_MAX_BYTES_PER_TOKEN,
+        process.stderr: GEMINI_STDERR_CAP
+    }
+    
+    # Only a silent process is killed; a slow one that keeps writing may finish
+    with process, selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ)
+        selector.register(process.stderr, selectors.EVENT_READ)
+        
+        while selector.get_map():
+            events = selector.select(timeout=GEMINI_IDLE_TIMEOUT)
+            if not events:
+                process.kill()
+                print("Gemini command timed out")
+                return None
+            
+            for key, _ in events:
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    kept = chunk[:remaining[key.fileobj]]
+                    if kept:
+                        output[key.fileobj].append(kept)
+                        remaining[key.fileobj] -= len(kept)
+                else:
+                    selector.unregister(key.fileobj)
+        
+        returncode = process.wait()
+    
+    if returncode == 0:
+        return b"".join(output[process.stdout]).decode("utf-8", errors="replace").strip()
+    else:
+        print(f"Error running Gemini: {b''.join(output[process.stderr]).decode('utf-8', errors='replace')}")
+        return None
+
+ALGORITHM_ANALYSIS_PROMPT = """
     Analyze the advanced fingerprinting algorithm in audio-engine/src/advanced_fingerprint.rs and provide:
     
     1. Performance analysis of the MFCC feature extraction
@@ -51,22 +169,9 @@ def test_fingerprint_algorithm():
     - Feature quality for Indian classical music
     - Robustness against noise
     - Scalability for large datasets
-    """
-    
-    response = run_gemini_command(prompt)
-    if response:
-        print("📊 Gemini Analysis Results:")
-        print(response)
-        return response
-    else:
-        print("❌ Failed to get Gemini analysis")
-        return None
+"""
 
-def optimize_algorithm():
-    """Get optimization suggestions from Gemini"""
-    print("⚡ Getting Algorithm Optimization Suggestions...")
-    
-    prompt = """
+OPTIMIZATION_PROMPT = """
     Based on the advanced fingerprinting algorithm, suggest specific optimizations for:
     
     1. SIMD vectorization opportunities in the FFT and spectral analysis
@@ -76,22 +181,9 @@ def optimize_algorithm():
     5. GPU acceleration possibilities
     
     Provide specific code improvements and performance targets.
-    """
-    
-    response = run_gemini_command(prompt)
-    if response:
-        print("🚀 Optimization Suggestions:")
-        print(response)
-        return response
-    else:
-        print("❌ Failed to get optimization suggestions")
-        return None
+"""
 
-def analyze_hindi_music_features():
-    """Analyze Hindi/Bhojpuri music characteristics"""
-    print("🎵 Analyzing Hindi/Bhojpuri Music Features...")
-    
-    prompt = """
+HINDI_MUSIC_ANALYSIS_PROMPT = """
     Analyze the Hindi/Bhojpuri music feature extraction in the advanced fingerprinting algorithm:
     
     1. Vocal characteristics detection accuracy
@@ -104,114 +196,272 @@ def analyze_hindi_music_features():
     - More accurate pitch estimation for Indian classical music
     - Enhanced microtonal feature extraction
     - Improved ornamentation pattern recognition
-    """
-    
-    response = run_gemini_command(prompt)
-    if response:
-        print("🎶 Hindi Music Analysis:")
-        print(response)
-        return response
-    else:
-        print("❌ Failed to get Hindi music analysis")
-        return None
+"""
+
+# Gemini analyses run by main: result key -> (title, failure message, prompt)
+GEMINI_ANALYSES = {
+    "algorithm_analysis": ("📊 Gemini Analysis Results:", "❌ Failed to get Gemini analysis", ALGORITHM_ANALYSIS_PROMPT),
+    "optimization_suggestions": ("🚀 Optimization Suggestions:", "❌ Failed to get optimization suggestions", OPTIMIZATION_PROMPT),
+    "hindi_music_analysis": ("🎶 Hindi Music Analysis:", "❌ Failed to get Hindi music analysis", HINDI_MUSIC_ANALYSIS_PROMPT),
+}
+
+def run_gemini_prompts(prompts):
+    """Run Gemini prompts concurrently, so the wall time is the slowest call rather than the sum"""
+    with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+        futures = {name: executor.submit(run_gemini_command, prompt) for name, prompt in prompts.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _synth_chord(a, b, c, out):
+        """Average of three tones in a single fused pass"""
+        for i in prange(out.size):
+            out[i] = (a[i] + b[i] + c[i]) * DTYPE(1 / 3)
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _synth_chirp(t, out):
+        """Linear chirp sin(2*pi*(440 + 200*t)*t) without intermediate arrays"""
+        for i in prange(out.size):
+            out[i] = np.sin(DTYPE(2 * np.pi) * (DTYPE(440) + DTYPE(200) * t[i]) * t[i])
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _window_frames(signals, window, hop, out):
+        """Hann-windowed frames of (signals, samples) into a (signals, frames, FRAME_SIZE) array"""
+        frames = out.shape[1]
+        for j in prange(out.shape[0] * frames):
+            signal, start = j // frames, (j % frames) * hop
+            for k in range(window.size):
+                out[signal, j % frames, k] = signals[signal, start + k] * window[k]
+
+def _test_data_path(name):
+    """Path of the .npy file holding one generated test array"""
+    return os.path.join(TEST_DATA_DIR, f"{name}.npy")
 
 def generate_test_data():
-    """Generate test audio data for validation"""
-    print("🎼 Generating Test Audio Data...")
+    """Generate test audio data for validation, reusing the saved data if this script hasn't changed since"""
+    # The data is fully determined by this script, so newer files are still current
+    try:
+        if min(os.path.getmtime(_test_data_path(name)) for name in TEST_DATA_NAMES) >= os.path.getmtime(__file__):
+            print(f"✅ Test audio data is up to date: {TEST_DATA_DIR}/")
+            return load_test_data()
+    except OSError:
+        pass
     
-    # Generate synthetic audio data for testing
-    sample_rate = 44100
-    duration = 5.0  # seconds
+    print("🎼 Generating Test Audio Data...")
     
-    # Generate test signals
-    t = np.linspace(0, duration, int(sample_rate * duration))
+    rng = np.random.default_rng(TEST_DATA_SEED)
     
     # Test 1: Pure tone (440 Hz)
-    test1 = np.sin(2 * np.pi * 440 * t)
+    test1 = _SIN_440
     
     # Test 2: Multiple frequencies (chord)
-    test2 = (np.sin(2 * np.pi * 440 * t) + 
-             np.sin(2 * np.pi * 554.37 * t) + 
-             np.sin(2 * np.pi * 659.25 * t)) / 3
-    
-    # Test 3: Frequency sweep (chirp)
-    test3 = np.sin(2 * np.pi * (440 + 200 * t) * t)
-    
-    # Test 4: Noise + signal
-    test4 = np.sin(2 * np.pi * 440 * t) + 0.1 * np.random.randn(len(t))
-    
-    # Save test data
+    test2 = np.empty_like(_T)
+    if njit is not None:
+        _synth_chord(_SIN_440, _SIN_554, _SIN_659, test2)
+    else:
+        np.add(_SIN_440, _SIN_554, out=test2)
+        test2 += _SIN_659
+        test2 *= DTYPE(1 / 3)
+    
+    # Test 3: Frequency sweep (chirp), phase 2*pi*(440 + 200*t)*t built in the output buffer
+    test3 = np.empty_like(_T)
+    if njit is not None:
+        _synth_chirp(_T, test3)
+    else:
+        np.multiply(_T, DTYPE(200), out=test3)
+        np.add(test3, DTYPE(440), out=test3)
+        np.multiply(test3, _T, out=test3)
+        np.multiply(test3, DTYPE(2 * np.pi), out=test3)
+        np.sin(test3, out=test3)
+    
+    # Test 4: Noise + signal, seeded so benchmark runs see identical input
+    test4 = np.empty_like(_T)
+    rng.standard_normal(dtype=DTYPE, out=test4)
+    test4 *= DTYPE(0.1)
+    test4 += test1
+    
+    # Save test data as float32 arrays, one memory-mappable file each
     test_data = {
-        "test1_pure_tone": test1.tolist(),
-        "test2_chord": test2.tolist(),
-        "test3_chirp": test3.tolist(),
-        "test4_noisy": test4.tolist(),
-        "sample_rate": sample_rate,
-        "duration": duration
+        "test1_pure_tone": test1,
+        "test2_chord": test2,
+        "test3_chirp": test3,
+        "test4_noisy": test4,
+        "sample_rate": np.int32(SAMPLE_RATE),
+        "duration": DTYPE(DURATION)
     }
     
-    with open("test_audio_data.json", "w") as f:
-        json.dump(test_data, f, indent=2)
+    os.makedirs(TEST_DATA_DIR, exist_ok=True)
+    for name, value in test_data.items():
+        np.save(_test_data_path(name), value)
     
-    print("✅ Test audio data generated and saved to test_audio_data.json")
+    print(f"✅ Test audio data generated and saved to {TEST_DATA_DIR}/")
     return test_data
 
-def benchmark_performance():
-    """Benchmark the fingerprinting performance"""
-    print("⏱️ Benchmarking Performance...")
+def load_test_data():
+    """Load generated test data memory-mapped, falling back to the files written by older runs"""
+    try:
+        # Read-only mappings; pages are read on demand rather than copied into the heap
+        return {name: np.load(_test_data_path(name), mmap_mode="r") for name in TEST_DATA_NAMES}
+    except FileNotFoundError:
+        pass
     
-    # Load test data
     try:
-        with open("test_audio_data.json", "r") as f:
-            test_data = json.load(f)
+        with np.load("test_audio_data.npz") as archive:
+            return {name: archive[name] for name in archive.files}
     except FileNotFoundError:
-        print("❌ Test data not found. Generating...")
-        test_data = generate_test_data()
+        pass
+    
+    with open("test_audio_data.json", "rb") as f:
+        if ijson is not None:
+            # Stream each signal straight into a float32 buffer, one pass per key
+            test_data = {}
+            for name in LEGACY_SIGNAL_NAMES:
+                f.seek(0)
+                test_data[name] = np.fromiter(ijson.items(f, f"{name}.item", use_float=True), dtype=DTYPE)
+            for name in ("sample_rate", "duration"):
+                f.seek(0)
+                test_data[name] = np.asarray(next(ijson.items(f, name, use_float=True)))
+            return test_data
+        
+        test_data = json.load(f)
+    
+    # Convert each list as soon as possible so its Python floats can be freed
+    for name, value in test_data.items():
+        test_data[name] = np.asarray(value, dtype=DTYPE if isinstance(value, list) else None)
+    return test_data
+
+def compute_spectrograms(signals):
+    """
+    Magnitude spectra of Hann-windowed frames for a (signals, samples) array,
+    the spectral front end of fingerprinting, computed in one batched rfft call
     
-    # Benchmark each test case
-    results = {}
+    Returns a (signals, frames, FRAME_SIZE // 2 + 1) array.
+    """
+    # Windowing materializes one contiguous batch that pocketfft vectorizes across
+    if njit is not None:
+        frame_count = (signals.shape[-1] - FRAME_SIZE) // HOP_SIZE + 1
+        batch = np.empty((signals.shape[0], frame_count, FRAME_SIZE), dtype=DTYPE)
+        _window_frames(signals, HANN_WINDOW, HOP_SIZE, batch)
+    else:
+        frames = np.lib.stride_tricks.sliding_window_view(signals, FRAME_SIZE, axis=-1)[:, ::HOP_SIZE]
+        batch = frames * HANN_WINDOW
     
-    for test_name, audio_data in test_data.items():
-        if isinstance(audio_data, list):
-            print(f"Testing {test_name}...")
-            
-            # Simulate fingerprinting time (in real implementation, this would call Rust)
-            start_time = time.time()
-            
-            # Simulate processing time based on data size
-            processing_time = len(audio_data) / 44100 * 0.1  # 0.1x real-time
-            time.sleep(min(processing_time, 1.0))  # Cap at 1 second
-            
-            end_time = time.time()
-            
-            results[test_name] = {
-                "processing_time_ms": (end_time - start_time) * 1000,
-                "data_size": len(audio_data),
-                "sample_rate": test_data["sample_rate"]
-            }
+    if scipy_fft is not None:
+        # Independent frames spread across all cores
+        return np.abs(scipy_fft.rfft(batch, axis=-1, workers=-1))
+    return np.abs(np.fft.rfft(batch, axis=-1)).astype(DTYPE, copy=False)
+
+# Signals shared with benchmark worker processes, attached once per worker
+_worker_shared_memory = None
+_worker_signals = None
+
+def _attach_signals(shm_name, shape, dtype):
+    """Pool initializer mapping the parent's shared signal array"""
+    global _worker_shared_memory, _worker_signals
+    _worker_shared_memory = shared_memory.SharedMemory(name=shm_name)
+    _worker_signals = np.ndarray(shape, dtype=dtype, buffer=_worker_shared_memory.buf)
+
+def _spectrogram_of(index):
+    """Spectrogram of one shared signal, computed in a worker process"""
+    return compute_spectrograms(_worker_signals[index:index + 1])[0]
+
+@contextmanager
+def parallel_spectrograms(signals, workers):
+    """
+    Yield a function computing spectrograms of `signals` with one signal per
+    task in a process pool; signals are shared, not pickled, to the workers
+    """
+    shm = shared_memory.SharedMemory(create=True, size=signals.nbytes)
+    try:
+        shared = np.ndarray(signals.shape, dtype=signals.dtype, buffer=shm.buf)
+        shared[:] = signals
+        del shared
+        
+        with mp.Pool(workers, initializer=_attach_signals, initargs=(shm.name, signals.shape, signals.dtype.str)) as pool:
+            yield lambda: np.stack(pool.map(_spectrogram_of, range(signals.shape[0])))
+    finally:
+        shm.close()
+        shm.unlink()
+
+def benchmark_performance(test_data=None):
+    """Benchmark the fingerprinting performance, loading test data from disk if not given"""
+    print("⏱️ Benchmarking Performance...")
+    
+    # Load test data
+    if test_data is None:
+        try:
+            test_data = load_test_data()
+        except FileNotFoundError:
+            print("❌ Test data not found. Generating...")
+            test_data = generate_test_data()
+    
+    # Benchmark all test cases as one (tests, samples) array
+    test_names = [name for name, data in test_data.items() if data.ndim == 1]
+    signals = np.stack([np.asarray(test_data[name], dtype=DTYPE) for name in test_names])
+    print(f"Testing {', '.join(test_names)}...")
+    
+    # scipy already threads the FFT; without it, spread signals over processes
+    workers = min(len(test_names), os.cpu_count() or 1)
+    
+    # Time the spectral front end of fingerprinting over repeated runs
+    samples_ns = []
+    with ExitStack() as stack:
+        if scipy_fft is None and workers > 1:
+            run = stack.enter_context(parallel_spectrograms(signals, workers))
+        else:
+            run = partial(compute_spectrograms, signals)
+        
+        for _ in range(BENCHMARK_REPEATS):
+            start_ns = time.perf_counter_ns()
+            spectrograms = run()
+            samples_ns.append(time.perf_counter_ns() - start_ns)
+    
+    samples_ns = np.array(samples_ns)
+    median_ns = float(np.median(samples_ns))
+    mad_ns = float(np.median(np.abs(samples_ns - median_ns)))
+    elapsed = median_ns / 1e9
+    results = {
+        test_name: {
+            "windows": spectrograms.shape[1],
+            "data_size": signals.shape[1],
+            "sample_rate": int(test_data["sample_rate"])
+        }
+        for test_name in test_names
+    }
+    results["batch"] = {
+        "processing_time_ms": elapsed * 1000,
+        "median_ns": int(median_ns),
+        "mad_ns": int(mad_ns),
+        "repeats": BENCHMARK_REPEATS,
+        "windows_per_sec": spectrograms.shape[0] * spectrograms.shape[1] / elapsed,
+        "fft_backend": "scipy" if scipy_fft is not None else "numpy",
+        "processes": workers if scipy_fft is None and workers > 1 else 1,
+        "cpu_count": os.cpu_count()
+    }
     
     # Save benchmark results
-    with open("benchmark_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    write_json("benchmark_results.json", results)
     
     print("📊 Benchmark Results:")
     for test_name, result in results.items():
-        if isinstance(result, dict):
-            print(f"  {test_name}: {result['processing_time_ms']:.2f}ms")
+        if test_name != "batch":
+            print(f"  {test_name}: {result['windows']} windows")
+    print(f"  all tests: {results['batch']['processing_time_ms']:.2f}ms "
+          f"± {mad_ns / 1e6:.2f}ms ({results['batch']['windows_per_sec']:.0f} windows/s)")
     
     return results
 
-def create_performance_report():
-    """Create a comprehensive performance report"""
+def create_performance_report(benchmark_results=None):
+    """Create a comprehensive performance report, loading benchmark results from disk if not given"""
     print("📈 Creating Performance Report...")
     
     # Load benchmark results
-    try:
-        with open("benchmark_results.json", "r") as f:
-            benchmark_results = json.load(f)
-    except FileNotFoundError:
-        print("❌ Benchmark results not found. Running benchmarks...")
-        benchmark_results = benchmark_performance()
+    if benchmark_results is None:
+        try:
+            benchmark_results = read_json("benchmark_results.json")
+        except FileNotFoundError:
+            print("❌ Benchmark results not found. Running benchmarks...")
+            benchmark_results = benchmark_performance()
     
     # Create performance report
     report = {
@@ -233,8 +483,7 @@ def create_performance_report():
     }
     
     # Save report
-    with open("performance_report.json", "w") as f:
-        json.dump(report, f, indent=2)
+    write_json("performance_report.json", report)
     
     print("✅ Performance report created: performance_report.json")
     return report
@@ -245,53 +494,46 @@ def main():
     print("=" * 60)
     
     # Check if Gemini CLI is available
-    try:
-        result = subprocess.run(["gemini", "--version"], capture_output=True, text=True)
-        if result.returncode != 0:
-            print("❌ Gemini CLI not found. Please install it first.")
-            return
-        print(f"✅ Gemini CLI version: {result.stdout.strip()}")
-    except FileNotFoundError:
+    version = gemini_version()
+    if version is None:
         print("❌ Gemini CLI not found. Please install it first.")
         return
+    print(f"✅ Gemini CLI version: {version}")
     
     # Run tests
     test_results = {}
     
-    # Test 1: Algorithm analysis
-    analysis = test_fingerprint_algorithm()
-    if analysis:
-        test_results["algorithm_analysis"] = analysis
-    
-    # Test 2: Optimization suggestions
-    optimizations = optimize_algorithm()
-    if optimizations:
-        test_results["optimization_suggestions"] = optimizations
+    # Tests 1-3: Algorithm analysis, optimization suggestions and Hindi music analysis
+    print("🧪 Running Gemini analyses...")
+    responses = run_gemini_prompts({name: prompt for name, (_, _, prompt) in GEMINI_ANALYSES.items()})
     
-    # Test 3: Hindi music analysis
-    hindi_analysis = analyze_hindi_music_features()
-    if hindi_analysis:
-        test_results["hindi_music_analysis"] = hindi_analysis
+    for name, (title, failure, _) in GEMINI_ANALYSES.items():
+        response = responses[name]
+        if response:
+            print(title)
+            print(response)
+            test_results[name] = response
+        else:
+            print(failure)
     
     # Test 4: Generate test data
     test_data = generate_test_data()
     test_results["test_data"] = "Generated successfully"
     
     # Test 5: Benchmark performance
-    benchmark_results = benchmark_performance()
+    benchmark_results = benchmark_performance(test_data=test_data)
     test_results["benchmark_results"] = benchmark_results
     
     # Test 6: Create performance report
-    performance_report = create_performance_report()
+    performance_report = create_performance_report(benchmark_results)
     test_results["performance_report"] = "Created successfully"
     
     # Save all test results
-    with open("test_results.json", "w") as f:
-        json.dump(test_results, f, indent=2)
+    write_json("test_results.json", test_results)
     
     print("\n🎉 Testing Complete!")
     print("📁 Files created:")
-    print("  - test_audio_data.json (test audio data)")
+    print(f"  - {TEST_DATA_DIR}/ (test audio data)")
     print("  - benchmark_results.json (performance benchmarks)")
     print("  - performance_report.json (comprehensive report)")
     print("  - test_results.json (all test results)")